@@ -0,0 +1,150 @@
+"""
+Firebase ID token authentication for protected routes.
+
+get_current_user verifies the bearer token once and caches the decoded claims, keyed
+by a hash of the token, until the token's own `exp`. Signature checks use Google's
+public keys through a cache-control aware session, and keep_keys_warm() refreshes
+those keys in the background so no request waits on fetching them.
+"""
+
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import cachecontrol
+import google.auth.transport.requests
+import requests
+from fastapi import Depends, Header, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from google.oauth2 import id_token
+
+from app.config import firebase_config
+from app.utils.user_directory import lookup_user_type, USER_TYPE_CLAIM
+
+logger = logging.getLogger("uvicorn")
+
+FIREBASE_CERTS_URL = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+FIREBASE_ISSUER = "https://securetoken.google.com/"
+TOKEN_CACHE_MAX_ENTRIES = 10_000
+KEY_REFRESH_SECONDS = 30 * 60
+CLOCK_SKEW_SECONDS = 10
+
+_session = cachecontrol.CacheControl(requests.Session())
+_request = google.auth.transport.requests.Request(session=_session)
+
+_tokens = OrderedDict()  # sha256(token) -> (claims, exp)
+_lock = threading.Lock()
+
+
+def _cache_get(key: str) -> Optional[dict]:
+    with _lock:
+        entry = _tokens.get(key)
+        if entry is None:
+            return None
+        claims, expires_at = entry
+        if expires_at <= time.time():
+            del _tokens[key]
+            return None
+        _tokens.move_to_end(key)
+        return claims
+
+
+def _cache_set(key: str, claims: dict):
+    with _lock:
+        _tokens[key] = (claims, claims["exp"])
+        _tokens.move_to_end(key)
+        while len(_tokens) > TOKEN_CACHE_MAX_ENTRIES:
+            _tokens.popitem(last=False)
+
+
+def verify_token(token: str) -> dict:
+    """Verifies a Firebase ID token like firebase_admin.auth.verify_id_token. Blocking."""
+    project_id = firebase_config["projectId"]
+    claims = id_token.verify_token(
+        token, _request, audience=project_id, certs_url=FIREBASE_CERTS_URL,
+        clock_skew_in_seconds=CLOCK_SKEW_SECONDS
+    )
+    if claims.get("iss") != FIREBASE_ISSUER + project_id:
+        raise ValueError("Token has an incorrect issuer")
+    if not claims.get("sub") or len(claims["sub"]) > 128:
+        raise ValueError("Token has an invalid subject")
+    claims["uid"] = claims["sub"]
+    return claims
+
+
+def _bearer_token(authorization: Optional[str]) -> str:
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Authorization header missing")
+    scheme, _, token = authorization.strip().partition(" ")
+    # The frontend historically sent the raw token without a scheme.
+    return token.strip() if scheme.lower() == "bearer" else authorization.strip()
+
+
+async def verify_id_token_cached(token: str) -> dict:
+    key = hashlib.sha256(token.encode()).hexdigest()
+    claims = _cache_get(key)
+    if claims is None:
+        try:
+            claims = await run_in_threadpool(verify_token, token)
+        except Exception:
+            raise HTTPException(status_code=401, detail="Invalid or expired token")
+        _cache_set(key, claims)
+    return claims
+
+
+async def get_current_user(authorization: Optional[str] = Header(None)) -> dict:
+    """Dependency returning the verified token claims ("uid", "email", ...) of the caller."""
+    return await verify_id_token_cached(_bearer_token(authorization))
+
+
+async def user_type(user: dict) -> Optional[str]:
+    """The caller's user type: the token's claim, else the user directory."""
+    if USER_TYPE_CLAIM not in user:
+        # Tokens minted before the account got its claim; cache the answer on the claims.
+        user[USER_TYPE_CLAIM] = await lookup_user_type(user["uid"], user.get("email"))
+    return user[USER_TYPE_CLAIM]
+
+
+async def require_admin(user: dict = Depends(get_current_user)) -> dict:
+    if await user_type(user) != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return user
+
+
+def require_user_type(*allowed: str):
+    """Dependency factory: 403 unless the caller's user type is one of `allowed`."""
+    async def dependency(user: dict = Depends(get_current_user)) -> dict:
+        if await user_type(user) not in allowed:
+            raise HTTPException(status_code=403, detail="Not allowed for this account type")
+        return user
+    return dependency
+
+
+async def ensure_owner(user: dict, doc_id: Optional[str], *also_allowed: str):
+    """
+    Raises 403 unless `doc_id` is the caller's own user document (documents are keyed by
+    uid). Admins, and callers whose user type is in `also_allowed`, may access any.
+    """
+    if doc_id is not None and doc_id == user["uid"]:
+        return
+    if await user_type(user) in ("admin",) + also_allowed:
+        return
+    raise HTTPException(status_code=403, detail="Not allowed to access another user's profile")
+
+
+def _fetch_keys():
+    _request(url=FIREBASE_CERTS_URL, method="GET")
+
+
+async def keep_keys_warm():
+    """Fetches Google's token signing keys now and then every KEY_REFRESH_SECONDS."""
+    while True:
+        try:
+            await run_in_threadpool(_fetch_keys)
+        except Exception as e:
+            logger.warning(f"Could not refresh token signing keys: {e}")
+        await asyncio.sleep(KEY_REFRESH_SECONDS)
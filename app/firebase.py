@@ -1,4 +1,4 @@
-from firebase_admin import credentials, initialize_app, firestore, storage
+from firebase_admin import credentials, initialize_app, firestore_async, storage
 import pyrebase
 from app.config import firebase_config
 import os
@@ -22,6 +22,8 @@ def init_firebase():
 
 init_firebase()
 
-# Export Firestore and Storage
-db = firestore.client()
+# Export Firestore and Storage.
+# The async client keeps Firestore round trips off the event loop, so every
+# call on `db` must be awaited (`async for` for `.stream()`).
+db = firestore_async.client()
 bucket = storage.bucket()
@@ -3,20 +3,39 @@ Main entry point for the Talent FastAPI application.
 Sets up the FastAPI instance and registers routes.
 """
 
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Depends
+from app.auth import get_current_user, keep_keys_warm
+from app.services.http_client import close_http_client
+from app.utils.logger import start_log_shipper, stop_log_shipper
 from app.routes.auth import router as auth_router
 from app.routes.admin import admin_router
 from app.routes.candidate import candidate_router as candidate_router
 from app.routes.employer import employer_router
 from app.routes.jobs import router as job_router
 from app.routes.matched import router as matched_job_router
+from app.routes.files import router as files_router
+from app.settings import settings
 from fastapi.middleware.cors import CORSMiddleware
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    key_refresh = asyncio.create_task(keep_keys_warm())
+    start_log_shipper()
+    yield
+    key_refresh.cancel()
+    await stop_log_shipper()
+    await close_http_client()
+
+
 app = FastAPI(
     title="Talent FastAPI",
     description="Talent API",
     docs_url="/",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -39,13 +58,18 @@ app.add_middleware(
 )
 
 
-# Register routes
+# Register routes. Job writes and the admin routes check the caller themselves.
+authenticated = [Depends(get_current_user)]
 app.include_router(auth_router)
 # app.include_router(candidate_router)
 app.include_router(job_router)
-app.include_router(matched_job_router)
-app.include_router(candidate_router, prefix="/candidate", tags=["Candidate Management"])
-app.include_router(employer_router, prefix="/employer", tags=["Employer Management"])
+app.include_router(matched_job_router, dependencies=authenticated)
+app.include_router(candidate_router, prefix="/candidate", tags=["Candidate Management"], dependencies=authenticated)
+app.include_router(employer_router, prefix="/employer", tags=["Employer Management"], dependencies=authenticated)
 app.include_router(admin_router, prefix="/admin", tags=["Admin Management"])
 
+# Local storage backend serves its own signed file URLs
+if settings.storage_backend == "local":
+    app.include_router(files_router)
+
 
@@ -24,4 +24,5 @@ class MatchedJob(BaseModel):
     salary: Optional[str] = None  # Example: "R10000/pm"
     matched_on: datetime = Field(default_factory=datetime.utcnow)
     status: Optional[str] = MatchedJobStatus.PENDING
-    job_accepted: MatchedJobStatus = None
\ No newline at end of file
+    job_accepted: MatchedJobStatus = None
+    score: Optional[float] = None  # Skill match score between 0 and 1, set by the matcher
\ No newline at end of file
@@ -7,7 +7,7 @@ import re
 from pydantic import BaseModel, Field, EmailStr, field_validator, ValidationInfo, RootModel
 from typing import Optional, Dict, List
 
-from app.models.shared import UserType, ProfileStatus
+from app.models.shared import UserType, ProfileStatus, UploadKind
 
 
 class SignUpSchema(BaseModel):
@@ -180,6 +180,21 @@ class Profile(BaseModel):
     progress: ProgressModel = Field(default_factory=lambda: ProgressModel(steps=ProgressModel.default_steps()))
 
 
+class CandidateProfileUpdate(BaseModel):
+    """
+    Schema for a multi-section candidate profile update.
+    Only the sections that are provided are written.
+    """
+    basicInfo: Optional[BasicInformation] = None
+    education: Optional[List[Education]] = None
+    workExperience: Optional[List[WorkExperience]] = None
+    jobPreference: Optional[List[JobPreference]] = None
+    skills: Optional[List[str]] = None
+    projects: Optional[List[Projects]] = None
+    awards: Optional[List[Awards]] = None
+    progressSteps: Optional[Dict[str, ProgressStep]] = None
+
+
 class Account(BaseModel):
     """
     Schema for account-related settings.
@@ -196,3 +211,21 @@ class StatusUpdateSchema(BaseModel):
 class ResumeRequest(BaseModel):
     email: str
 
+
+class UploadRequest(BaseModel):
+    """
+    Schema for requesting a presigned direct-to-S3 upload.
+    """
+    kind: UploadKind
+    filename: str
+    contentType: str
+
+
+class UploadConfirmation(BaseModel):
+    """
+    Schema for confirming a finished direct upload.
+    `index` selects the education entry for education documents.
+    """
+    kind: UploadKind
+    key: str
+    index: Optional[int] = Field(None, ge=0)
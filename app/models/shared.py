@@ -31,3 +31,19 @@ class ApplicationStatus(str, Enum):
     OFFER_EXTENDED = "offer_extended"
     APPLICATION_REJECTED = "application_rejected"
     CANDIDATE_HIRED = "candidate_hired"
+
+
+class UploadKind(str, Enum):
+    PROFILE_PICTURE = "profile-picture"
+    COMPANY_LOGO = "company-logo"
+    EDUCATION_DOCUMENT = "education-document"
+
+
+class ImageSize(str, Enum):
+    SMALL = "sm"
+    MEDIUM = "md"
+
+
+class ImageFormat(str, Enum):
+    WEBP = "webp"
+    JPEG = "jpg"
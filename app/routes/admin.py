@@ -1,31 +1,29 @@
+import asyncio
+
 from fastapi import APIRouter, Query, HTTPException, Depends, Body
-from fastapi.responses import JSONResponse
-from firebase_admin import firestore
+from fastapi.responses import JSONResponse, StreamingResponse
 from datetime import datetime
 from typing import Optional
 
 from app.models.admin import ADMIN
-from app.models.shared import UserType
-
-# from app.auth import get_current_user
+from app.models.shared import UserType, ProfileStatus
+from app.utils.email_index import resolve_user_id, fetch_user_doc, remember_user_id, email_key, backfill_email_keys
+from app.utils.pagination import DEFAULT_PAGE_SIZE, EXPORT_BATCH_SIZE, MAX_PAGE_SIZE, cursor_offset, decode_cursor, \
+    encode_cursor, fetch_page, iter_documents, stream_json_array
+from app.services.search_service import search_users, fetch_users, index_user
 
-admin_router = APIRouter()
-db = firestore.client()
+from app.auth import require_admin
 
+from app.firebase import db
 
-# def admin_required(user: User = Depends(get_current_user)):
-#     if user.userType != 'admin':
-#         raise HTTPException(status_code=403, detail="Admin access required")
-#     return user
+admin_router = APIRouter(dependencies=[Depends(require_admin)])
 
 
 @admin_router.post("/create-admin", tags=["Admin Management"])
 async def create_admin(admin_data: ADMIN = Body(...)):
     try:
         admin_ref = db.collection("admin")
-        existing = admin_ref.where("email", "==", admin_data.email).stream()
-        existing_docs = [doc for doc in existing]
-        if existing_docs:
+        if await resolve_user_id("admin", admin_data.email):
             raise HTTPException(status_code=400, detail="Admin with this email already exists")
 
         now_str = datetime.utcnow().isoformat()
@@ -34,7 +32,9 @@ async def create_admin(admin_data: ADMIN = Body(...)):
         admin_data.userType = "admin"
 
         new_ref = admin_ref.document()
-        new_ref.set(admin_data.dict())
+        await new_ref.set({**admin_data.dict(), **email_key(admin_data.email)})
+        remember_user_id("admin", admin_data.email, new_ref.id)
+        index_user("admin", new_ref.id, admin_data.dict())
 
         return JSONResponse(
             content={"message": "Admin user created successfully", "id": new_ref.id},
@@ -48,16 +48,13 @@ async def create_admin(admin_data: ADMIN = Body(...)):
 @admin_router.get("/get-admin", tags=["Admin Management"])
 async def get_admin(email: str = Query(..., description="Admin email")):
     try:
-        admin_ref = db.collection("admin")
-        query = admin_ref.where("email", "==", email).stream()
-        docs = [doc for doc in query]
-
-        if not docs:
+        doc = await fetch_user_doc("admin", email)
+        if not doc:
             raise HTTPException(status_code=404, detail="Admin not found")
 
-        admin_data = docs[0].to_dict()
+        admin_data = doc.to_dict()
         return JSONResponse(
-            content={"id": docs[0].id, **admin_data},
+            content={"id": doc.id, **admin_data},
             status_code=200
         )
 
@@ -67,38 +64,56 @@ async def get_admin(email: str = Query(..., description="Admin email")):
 
 
 @admin_router.get("/users", tags=["Admin Management"])
-# @admin_router.get("/admin/companies", dependencies=[Depends(admin_required)])
 async def list_users(
     userType: str = Query(...),
     search: str = Query(None),
-    status: str = Query(None)
+    status: str = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    export: bool = Query(False, description="Stream every matching user as a JSON array instead of a page")
 ):
+    """
+    Lists users of one collection, optionally filtered by status. With `search`, users
+    come from the in-memory search index: those with a name, email or company name
+    containing the search text, ones where it starts a word first. Otherwise they are
+    paged in document id order.
+    """
     try:
-        ref = db.collection(userType.lower())
-        query = ref.stream()
-
-        users = []
-        for doc in query:
-            data = doc.to_dict()
-            match = True
-
-            if search:
-                search_lower = search.lower()
-                if userType == "candidate":
-                    match = search_lower in data.get("basicInfo", {}).get("firstName", "").lower() or \
-                            search_lower in data.get("basicInfo", {}).get("lastName", "").lower() or \
-                            search_lower in data.get("basicInfo", {}).get("email", "").lower()
-                else:
-                    match = search_lower in data.get("companyName", "").lower() or \
-                            search_lower in data.get("email", "").lower()
-
-            if status and data.get("status") != status:
-                match = False
-
-            if match:
-                users.append({"id": doc.id, **data})
-
-        return users
+        collection = userType.lower()
+        ref = db.collection(collection)
+
+        if search:
+            user_ids = await search_users(collection, search, status)
+
+            if export:
+                async def all_matches():
+                    for start in range(0, len(user_ids), EXPORT_BATCH_SIZE):
+                        for user in await fetch_users(collection, user_ids[start:start + EXPORT_BATCH_SIZE], status):
+                            yield user
+                return StreamingResponse(stream_json_array(all_matches()), media_type="application/json")
+
+            offset = cursor_offset(decode_cursor(cursor))
+            users = await fetch_users(collection, user_ids[offset:offset + limit], status)
+            next_offset = offset + limit
+            return {
+                "users": users,
+                "next_cursor": encode_cursor({"offset": next_offset}) if next_offset < len(user_ids) else None,
+                "total": len(user_ids)
+            }
+
+        query = ref.where("status", "==", status) if status else ref
+
+        if export:
+            users = ({"id": doc.id, **doc.to_dict()} async for doc in iter_documents(ref, query))
+            return StreamingResponse(stream_json_array(users), media_type="application/json")
+
+        docs = await fetch_page(ref, limit, decode_cursor(cursor).get("id"), query)
+        return {
+            "users": [{"id": doc.id, **doc.to_dict()} for doc in docs],
+            "next_cursor": encode_cursor({"id": docs[-1].id}) if len(docs) == limit else None
+        }
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching users: {str(e)}")
 
@@ -110,55 +125,79 @@ async def update_user_status(
     userType: str = Query(...)
 ):
     try:
-        collection = db.collection(userType.lower())
-        key = "basicInfo.email" if userType == "candidate" else "email"
-        query = collection.where(key, "==", email).stream()
-
-        docs = [doc for doc in query]
-        if not docs:
+        collection_name = userType.lower()
+        doc_id = await resolve_user_id(collection_name, email)
+        if not doc_id:
             raise HTTPException(status_code=404, detail=f"{userType.capitalize()} not found")
 
-        collection.document(docs[0].id).update({"status": status})
+        await db.collection(collection_name).document(doc_id).update({"status": status})
+        index_user(collection_name, doc_id, {"status": status})
 
         return {"message": f"Status for {email} updated to {status}"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating status: {str(e)}")
 
 
-@admin_router.get("/stats", tags=["Admin Management"])
-async def get_platform_stats():
+@admin_router.post("/backfill-email-keys", tags=["Admin Management"])
+async def backfill_user_email_keys():
+    """Adds the normalised emailKey used by email lookups to user documents written before it existed."""
     try:
-        stats = {}
-        for user_type in ["candidate", "employer"]:
-            ref = db.collection(user_type)
-            stats[user_type] = len([_ for _ in ref.stream()])
-        return JSONResponse(content=stats)
+        updated = {collection: await backfill_email_keys(collection) for collection in ("candidate", "employer", "admin")}
+        return {"message": "Email keys backfilled", "updated": updated}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to backfill email keys: {str(e)}")
 
 
-from fastapi import APIRouter, Query, HTTPException
-from fastapi.responses import JSONResponse
-from enum import Enum
-from typing import Optional
-from firebase_admin import firestore  # Assuming Firestore is used
+async def count_documents(query) -> int:
+    """Counts with a Firestore aggregation: one read per 1000 matches, no documents downloaded."""
+    results = await query.count().get()
+    return int(results[0][0].value)
+
+
+@admin_router.get("/stats", tags=["Admin Management"])
+async def get_platform_stats():
+    """
+    User totals per collection (top-level "candidate"/"employer" as before), plus
+    "by_user_type" and a "by_status" breakdown for candidates and employers.
+    Statuses outside ProfileStatus are reported as "other".
+    """
+    try:
+        user_types = [user_type.value for user_type in UserType]
+        statuses = [profile_status.value for profile_status in ProfileStatus]
+        status_types = [UserType.CANDIDATE.value, UserType.EMPLOYER.value]
+
+        counts = await asyncio.gather(
+            *(count_documents(db.collection(user_type)) for user_type in user_types),
+            *(count_documents(db.collection(user_type).where("status", "==", profile_status))
+              for user_type in status_types for profile_status in statuses)
+        )
+        totals = dict(zip(user_types, counts[:len(user_types)]))
+        status_counts = iter(counts[len(user_types):])
 
-admin_router = APIRouter()
-db = firestore.client()  # Firestore client instance
+        by_status = {}
+        for user_type in status_types:
+            by_status[user_type] = {profile_status: next(status_counts) for profile_status in statuses}
+            by_status[user_type]["other"] = totals[user_type] - sum(by_status[user_type].values())
 
-class UserType(str, Enum):
-    ADMIN = "admin"
-    EMPLOYER = "employer"
-    CANDIDATE = "candidate"
+        stats = {user_type: totals[user_type] for user_type in status_types}
+        stats["by_user_type"] = totals
+        stats["by_status"] = by_status
+        return JSONResponse(content=stats)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch stats: {str(e)}")
 
 @admin_router.get("/all-users", tags=["Admin Management"])
-async def get_all_users(user_type: Optional[UserType] = Query(None, description="Filter by userType")):
+async def get_all_users(
+    user_type: Optional[UserType] = Query(None, description="Filter by userType"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    export: bool = Query(False, description="Stream every user as a JSON array instead of a page")
+):
     """
     Retrieve all users. Optionally filter by userType: admin, employer, or candidate.
+    Collections are paged one after another; the cursor records which one it is in.
     """
     try:
-        users = []
-
         user_collections = {
             UserType.ADMIN: "admin",
             UserType.EMPLOYER: "employer",
@@ -170,15 +209,42 @@ async def get_all_users(user_type: Optional[UserType] = Query(None, description=
         else:
             collections_to_query = list(user_collections.keys())
 
-        for utype in collections_to_query:
-            for doc in db.collection(user_collections[utype]).stream():
-                data = doc.to_dict()
-                data["id"] = doc.id
-                data["userType"] = utype
-                users.append(data)
+        def to_user(doc, utype):
+            data = doc.to_dict()
+            data["id"] = doc.id
+            data["userType"] = utype
+            return data
+
+        if export:
+            async def all_users():
+                for utype in collections_to_query:
+                    async for doc in iter_documents(db.collection(user_collections[utype])):
+                        yield to_user(doc, utype)
+            return StreamingResponse(stream_json_array(all_users()), media_type="application/json")
 
-        return JSONResponse(content=users)
+        state = decode_cursor(cursor)
+        collection_index = cursor_offset(state, "c")
+        after_id = state.get("id")
 
+        users = []
+        next_cursor = None
+        while collection_index < len(collections_to_query):
+            utype = collections_to_query[collection_index]
+            collection = db.collection(user_collections[utype])
+            remaining = limit - len(users)
+            docs = await fetch_page(collection, remaining, after_id)
+            users.extend(to_user(doc, utype) for doc in docs)
+
+            if len(docs) == remaining:
+                next_cursor = encode_cursor({"c": collection_index, "id": docs[-1].id})
+                break
+            collection_index += 1
+            after_id = None
+
+        return {"users": users, "next_cursor": next_cursor}
+
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch users: {str(e)}")
 
@@ -1,28 +1,27 @@
+import asyncio
 from datetime import datetime
 
-from fastapi import APIRouter, HTTPException, Request, Body, status
+from fastapi import APIRouter, HTTPException, Body, Depends, status
 from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 from firebase_admin import auth
 
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
-
 from app.settings import settings
 
-from app.config import SENDGRID_API_KEY, SENDER_EMAIL  # your config setup
-
 from app.models.models import SignUpSchema, ProgressModel, LoginSchema, ProfileStatus, UserType, ForgotPasswordRequest
 from app.utils.logger import log_error
+from app.utils.email_index import remember_user_id, email_key
+from app.auth import get_current_user
+from app.utils.user_directory import lookup_user_type, register_user_type
+from app.services.search_service import index_user
 
-from app.config import firebase_config
 from app.services.auth_service import verify_current_password, update_password
+from app.services.http_client import get_http_client, send_email
 from app.firebase import db
 from app.firebase import firebase
 
 from pydantic import EmailStr
 
-import requests
-
 GITHUB_USER_API = "https://api.github.com/user"
 GITHUB_EMAILS_API = "https://api.github.com/user/emails"
 
@@ -52,6 +51,7 @@ async def create_an_account(user_data: SignUpSchema = Body(...)):
             "status": ProfileStatus.PENDING,
             "createdAt": created_at,
             "userType": user_data.userType,
+            **email_key(user_data.email),
         }
 
         if user_data.userType == UserType.CANDIDATE:
@@ -79,7 +79,10 @@ async def create_an_account(user_data: SignUpSchema = Body(...)):
         else:
             raise HTTPException(status_code=400, detail="Invalid user type")
 
-        db.collection(collection).document(user.uid).set(data_to_store)
+        await db.collection(collection).document(user.uid).set(data_to_store)
+        remember_user_id(collection, user_data.email, user.uid)
+        index_user(collection, user.uid, data_to_store)
+        await register_user_type(user.uid, collection, user_data.email)
 
         return JSONResponse(
             content={"message": f"Account created successfully. User ID: {user.uid}"},
@@ -107,22 +110,14 @@ async def create_an_account(user_data: SignUpSchema = Body(...)):
 @router.post("/login", tags=["Auth"])
 async def login(user_data: LoginSchema = Body(...)):
     try:
-        user = firebase.auth().sign_in_with_email_and_password(
+        user = await run_in_threadpool(
+            firebase.auth().sign_in_with_email_and_password,
             user_data.email,
             user_data.password
         )
         token = user['idToken']
 
-        user_type = None
-        for utype in ["candidate", "employer","admin"]:
-            if utype == "candidate":
-                docs = list(db.collection(utype).where("basicInfo.email", "==", user_data.email).stream())
-            else:
-                docs = list(db.collection(utype).where("email", "==", user_data.email).stream())
-
-            if docs:
-                user_type = utype
-                break
+        user_type = await lookup_user_type(user['localId'], user_data.email, token)
 
         if not user_type:
             raise HTTPException(status_code=404, detail="User type not found.")
@@ -166,24 +161,17 @@ async def send_verification_email(email: EmailStr):
 
 
 @router.post("/ping", tags=["App Health"])
-async def validate_token(request: Request):
+async def validate_token(user: dict = Depends(get_current_user)):
     """
-    Validates a provided JWT token from the request headers.
+    Validates the JWT token from the Authorization header.
 
     Args:
-        request (Request): The request object containing the JWT token.
+        user (dict): The verified token claims, see app.auth.get_current_user.
 
     Returns:
         dict: A dictionary containing the user ID if the token is valid.
     """
-    jwt = request.headers.get("authorization")
-    if not jwt:
-        raise HTTPException(status_code=401, detail="Authorization header missing")
-    try:
-        user = auth.verify_id_token(jwt)
-        return {"user_id": user["user_id"]}
-    except Exception as e:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    return {"user_id": user["uid"]}
 
 
 
@@ -194,12 +182,10 @@ async def change_password(
         new_password: str = Body(...)
 ):
     try:
-        api_key = firebase_config["apiKey"]
+        await verify_current_password(email, current_password)
 
-        _ = verify_current_password(email, current_password, api_key)
-
-        uid = auth.get_user_by_email(email).uid
-        update_password(uid, new_password)
+        user = await run_in_threadpool(auth.get_user_by_email, email)
+        await run_in_threadpool(update_password, user.uid, new_password)
 
         return {"message": "Password updated successfully"}
 
@@ -216,13 +202,13 @@ async def github_login(idToken: str = Body(..., embed=True)):
     and returns user details or creates them in Firestore.
     """
     try:
-        decoded_token = auth.verify_id_token(idToken)
+        decoded_token = await run_in_threadpool(auth.verify_id_token, idToken)
         uid = decoded_token['uid']
         email = decoded_token.get('email')
 
         # Check if user already exists in Firestore
         user_ref = db.collection("candidate").document(uid)
-        user_doc = user_ref.get()
+        user_doc = await user_ref.get()
 
         if not user_doc.exists:
             # Create a minimal user entry
@@ -236,9 +222,12 @@ async def github_login(idToken: str = Body(..., embed=True)):
                     "firstName": "",  # optional: you could pull from decoded_token
                     "lastName": ""
                 },
-                "progressSteps": ProgressModel.default_steps()
+                "progressSteps": ProgressModel.default_steps(),
+                **email_key(email),
             }
-            user_ref.set(user_data_to_store)
+            await user_ref.set(user_data_to_store)
+            index_user("candidate", user_ref.id, user_data_to_store)
+            await register_user_type(user_ref.id, "candidate", email)
 
         return JSONResponse(content={"message": "GitHub login successful", "uid": uid}, status_code=200)
 
@@ -253,14 +242,16 @@ async def github_login(accessToken: str = Body(..., embed=True)):
     Verifies GitHub OAuth access token, fetches user data, and returns Firebase custom token.
     """
     try:
-        # Get GitHub user info
+        # Get GitHub user info and primary email (in case it's not public in `user_data`)
         headers = {"Authorization": f"Bearer {accessToken}"}
-        user_response = requests.get(GITHUB_USER_API, headers=headers)
+        client = get_http_client()
+        user_response, email_response = await asyncio.gather(
+            client.get(GITHUB_USER_API, headers=headers),
+            client.get(GITHUB_EMAILS_API, headers=headers),
+        )
         user_response.raise_for_status()
         user_data = user_response.json()
 
-        # Get primary email (in case it's not public in `user_data`)
-        email_response = requests.get(GITHUB_EMAILS_API, headers=headers)
         email_response.raise_for_status()
         email_data = email_response.json()
         primary_email = next((e["email"] for e in email_data if e.get("primary")), None)
@@ -284,7 +275,7 @@ async def github_login(accessToken: str = Body(..., embed=True)):
 
         # Firestore user setup
         user_ref = db.collection("candidate").document(github_uid)
-        user_doc = user_ref.get()
+        user_doc = await user_ref.get()
 
         if not user_doc.exists:
             created_at = datetime.utcnow().isoformat()
@@ -297,9 +288,12 @@ async def github_login(accessToken: str = Body(..., embed=True)):
                     "firstName": display_name.split()[0] if display_name else "",
                     "lastName": " ".join(display_name.split()[1:]) if display_name and len(display_name.split()) > 1 else ""
                 },
-                "progressSteps": ProgressModel.default_steps()
+                "progressSteps": ProgressModel.default_steps(),
+                **email_key(email),
             }
-            user_ref.set(user_data_to_store)
+            await user_ref.set(user_data_to_store)
+            index_user("candidate", user_ref.id, user_data_to_store)
+            await register_user_type(user_ref.id, "candidate", email)
 
         return JSONResponse(content={"customToken": custom_token.decode('utf-8')}, status_code=200)
 
@@ -314,14 +308,13 @@ async def forgot_password(request: ForgotPasswordRequest):
 
     try:
         # Generate reset link
-        reset_link = auth.generate_password_reset_link(request.email)
-
-        # Compose email
-        message = Mail(
-            from_email=settings.sender_email,
-            to_emails=request.email,
-            subject="Reset Your Password",
-            html_content=f"""
+        reset_link = await run_in_threadpool(auth.generate_password_reset_link, request.email)
+
+        # Send email
+        await send_email(
+            request.email,
+            "Reset Your Password",
+            f"""
                 <p>Hello,</p>
                 <p>You requested a password reset. Click the link below to reset your password:</p>
                 <a href="{reset_link}">Reset Password</a>
@@ -329,10 +322,6 @@ async def forgot_password(request: ForgotPasswordRequest):
             """
         )
 
-        # Send email
-        sg = SendGridAPIClient(settings.sendgrid_api_key)
-        sg.send(message)
-
         return {"message": "Password reset email sent successfully"}
 
     except auth.UserNotFoundError:
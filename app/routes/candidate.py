@@ -1,25 +1,35 @@
 import uuid
-from datetime import datetime
 from typing import List
 
 from app.models.employer import EmployerProfile
 from app.models.jobs import JobModel
 from app.models.matched import MatchedJob
 from app.models.models import ProgressModel, ProgressStep, BasicInformation, Education, JobPreference, WorkExperience, \
-    Projects, Awards, Account, StatusUpdateSchema, ResumeRequest
-from app.utils.candidate_helpers import fetch_candidate_by_email
-from app.utils.s3_helpers import generate_signed_url, upload_file_to_s3
-from app.settings import settings
-import boto3
+    Projects, Awards, Account, StatusUpdateSchema, ResumeRequest, CandidateProfileUpdate, UploadRequest, \
+    UploadConfirmation
+from app.models.shared import UploadKind, ImageSize, ImageFormat
+from app.utils.candidate_helpers import fetch_candidate_by_email, attach_education_file
+from app.auth import get_current_user, ensure_owner, require_user_type
+from app.utils.email_index import resolve_user_id, fetch_user_doc, remember_user_id, forget_user_id, \
+    normalize_email, email_key
+from app.utils.firestore_helpers import parse_fields, store_thumbnails
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor, fetch_page, \
+    iter_documents, stream_json_array
+from app.utils.s3_helpers import generate_signed_url, generate_signed_urls, store_upload, \
+    generate_presigned_upload, verify_uploaded_object, upload_image_to_s3, pick_image_key
+from app.utils.resume_cache import resume_cache, resume_digest
+from app.services.matching_service import SkillIndex, PreferenceIndex, match_job, rematch_candidate, \
+    candidate_preferences, job_requirements, DEFAULT_TOP_K, DEFAULT_MIN_SCORE
+from app.services.skill_service import skill_ids, skill_ids_of
+from app.services.search_service import index_user
+import hashlib
 import io
 
-from botocore.config import Config
-
 from botocore.exceptions import NoCredentialsError
 
-from fastapi import APIRouter, HTTPException, Body, Query, File, UploadFile, Request
-from fastapi.responses import JSONResponse, StreamingResponse
-from firebase_admin import firestore
+from fastapi import APIRouter, HTTPException, Body, Query, File, UploadFile, Request, Header, BackgroundTasks, Depends
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional
 from reportlab.pdfgen import canvas
 from weasyprint import HTML
@@ -32,55 +42,56 @@ env = Environment(loader=FileSystemLoader("app/templates"))
 
 from app.firebase import db
 
-s3_client = boto3.client(
-    "s3",
-    region_name=settings.aws_region,
-    aws_access_key_id=settings.aws_access_key,
-    aws_secret_access_key=settings.aws_secret_key,
-    config=Config(
-        signature_version="s3v4",
-        s3={'addressing_style': 'virtual'}
-    )
-)
-
-db = firestore.client()
 candidate_router = APIRouter()
 
 @candidate_router.get("/candidate", tags=["Candidate Management"])
-async def get_candidate_by_email(email: str = Query(...)):
+async def get_candidate_by_email(
+        email: str = Query(...),
+        fields: Optional[str] = Query(None, description="Comma separated field paths to return, e.g. basicInfo,skills"),
+        imageSize: Optional[ImageSize] = Query(None, description="Thumbnail size for profilePictureSignedUrl; omit for the original"),
+        imageFormat: ImageFormat = Query(ImageFormat.WEBP),
+        user: dict = Depends(get_current_user)
+):
     try:
-        candidates_ref = db.collection("candidate")
-        query = candidates_ref.where("basicInfo.email", "==", email).stream()
-
-        candidate = None
-        candidate_id = None
+        field_paths = parse_fields(fields)
+        if field_paths and "profilePictureSignedUrl" in field_paths:
+            field_paths = [path for path in field_paths if path != "profilePictureSignedUrl"] + \
+                          ["profilePicture", "profilePictureThumbnails"]
 
-        for doc in query:
-            candidate = doc.to_dict()
-            candidate_id = doc.id
-            break
-
-        if not candidate:
+        candidate_doc = await fetch_user_doc("candidate", email, field_paths=field_paths)
+        await ensure_owner(user, candidate_doc.id if candidate_doc else None, "employer")
+        if not candidate_doc:
             raise HTTPException(status_code=404, detail="Candidate not found")
 
-        default_steps = ProgressModel.default_steps()
-        progress_steps_data = candidate.get("progressSteps", {})
-
-        sorted_progress_steps = {
-            step: ProgressStep(**progress_steps_data.get(step, default_steps[step])).dict()
-            for step in default_steps
-        }
-
-        file_key = candidate.get("profilePicture")
-        if file_key:
-            candidate["profilePictureSignedUrl"] = generate_signed_url(file_key)
+        candidate = candidate_doc.to_dict()
+        candidate_id = candidate_doc.id
 
         response = {
             "id": candidate_id,
             **candidate,
-            "progressSteps": sorted_progress_steps
         }
 
+        if not field_paths or "progressSteps" in field_paths:
+            default_steps = ProgressModel.default_steps()
+            progress_steps_data = candidate.get("progressSteps", {})
+
+            response["progressSteps"] = {
+                step: ProgressStep(**progress_steps_data.get(step, default_steps[step])).dict()
+                for step in default_steps
+            }
+
+        # Sign the profile picture and every education document in one pass.
+        education = response.get("education") or []
+        file_key = pick_image_key(candidate, "profilePicture", imageSize, imageFormat)
+        signed_urls = generate_signed_urls(
+            [file_key] + [entry.get("fileUrl") for entry in education if isinstance(entry, dict)]
+        )
+        if file_key:
+            response["profilePictureSignedUrl"] = signed_urls[file_key]
+        for entry in education:
+            if isinstance(entry, dict) and entry.get("fileUrl"):
+                entry["fileUrlSigned"] = signed_urls[entry["fileUrl"]]
+
         return JSONResponse(content=response, status_code=200)
 
     except HTTPException as he:
@@ -92,25 +103,23 @@ async def get_candidate_by_email(email: str = Query(...)):
         )
 
 @candidate_router.put("/status", tags=["Candidate Management"])
-async def update_candidate_status(data: StatusUpdateSchema):
+async def update_candidate_status(data: StatusUpdateSchema, user: dict = Depends(get_current_user)):
     try:
-        candidates_ref = db.collection("candidate")
-        query = candidates_ref.where("basicInfo.email", "==", data.email).stream()
-
-        updated = False
-        for doc in query:
-            doc_ref = candidates_ref.document(doc.id)
-            doc_ref.update({"status": data.status})
-            updated = True
-
-        if not updated:
+        candidate_id = await resolve_user_id("candidate", data.email)
+        await ensure_owner(user, candidate_id)
+        if not candidate_id:
             raise HTTPException(status_code=404, detail="Candidate not found")
 
+        await db.collection("candidate").document(candidate_id).update({"status": data.status})
+        index_user("candidate", candidate_id, {"status": data.status})
+
         return JSONResponse(
             content={"message": f"Status updated to {data.status} for {data.email}"},
             status_code=200
         )
 
+    except HTTPException as he:
+        raise he
     except Exception as e:
         print("Error updating candidate status:", e)
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -118,24 +127,21 @@ async def update_candidate_status(data: StatusUpdateSchema):
 @candidate_router.post("/update-picture", tags=["Candidate Management"])
 async def upload_image(
         email: str = Query(...),
-        file: UploadFile = File(...)
+        file: UploadFile = File(...),
+        user: dict = Depends(get_current_user)
 ):
     try:
-        file_url = upload_file_to_s3(file, folder="profile-pictures")
+        candidate_id = await resolve_user_id("candidate", email)
+        await ensure_owner(user, candidate_id)
+        if not candidate_id:
+            raise HTTPException(status_code=404, detail="Candidate not found")
 
-        # Extract just the S3 key (for saving in Firestore)
-        file_key = file_url.split(".com/")[-1]
+        file_key, thumbnails = await run_in_threadpool(upload_image_to_s3, file, "profile-pictures")
 
         # Update Firestore
-        candidates_ref = db.collection("candidate")
-        query = candidates_ref.where("basicInfo.email", "==", email).stream()
-        candidate_docs = [doc for doc in query]
 
-        if not candidate_docs:
-            raise HTTPException(status_code=404, detail="Candidate not found")
-
-        candidate_ref = candidates_ref.document(candidate_docs[0].id)
-        candidate_ref.update({"profilePicture": file_key})
+        candidate_ref = db.collection("candidate").document(candidate_id)
+        await candidate_ref.update({"profilePicture": file_key, "profilePictureThumbnails": thumbnails})
 
         # Generate signed URL for frontend use
         signed_url = generate_signed_url(file_key)
@@ -148,6 +154,8 @@ async def upload_image(
 
     except NoCredentialsError:
         return {"error": "Credentials not available"}
+    except HTTPException as he:
+        raise he
     except Exception as e:
         return {"error": str(e)}
 
@@ -155,46 +163,26 @@ async def upload_image(
 @candidate_router.post("/upload-file", tags=["Candidate Management"])
 async def upload_education_file(
         email: str = Query(...),
-        index: int = Query(...),  # index of the education entry to update
+        index: int = Query(..., ge=0),  # index of the education entry to update
         file: UploadFile = File(...),
-        folder: Optional[str] = Query("education-documents")
+        folder: Optional[str] = Query("education-documents"),
+        user: dict = Depends(get_current_user)
 ):
     """
     Upload a file to S3 and attach the fileUrl to the candidate's education[index].
     """
     try:
+        candidate_id = await resolve_user_id("candidate", email)
+        await ensure_owner(user, candidate_id)
+        if not candidate_id:
+            raise HTTPException(status_code=404, detail="Candidate not found")
+
         # Upload file
-        file_url = upload_file_to_s3(file, folder)
-        file_key = file_url.split(".com/")[-1]
+        file_key = await run_in_threadpool(store_upload, file, folder)
         logger.info(f"Uploaded file to S3: {file_key}")
 
         # Update candidate's education[n].fileUrl
-        candidates_ref = db.collection("candidate")
-        query = candidates_ref.where("basicInfo.email", "==", email).stream()
-        candidate_docs = [doc for doc in query]
-
-        if not candidate_docs:
-            raise HTTPException(status_code=404, detail="Candidate not found")
-
-        candidate_doc = candidate_docs[0]
-        candidate_data = candidate_doc.to_dict()
-
-        education_list = candidate_data.get("education", [])
-
-        # Auto-extend the list to ensure the index is valid
-        while len(education_list) <= index:
-            education_list.append({
-                "institution": "",
-                "degree": "",
-                "fileUrl": ""
-            })
-
-        # Update fileUrl at the correct index
-        education_list[index]["fileUrl"] = file_key
-
-        # Save updated education list
-        candidate_ref = candidates_ref.document(candidate_doc.id)
-        candidate_ref.update({"education": education_list})
+        await attach_education_file(db.collection("candidate").document(candidate_id), index, file_key)
 
         # Generate signed URL
         signed_url = generate_signed_url(file_key)
@@ -207,30 +195,107 @@ async def upload_education_file(
 
     except NoCredentialsError:
         raise HTTPException(status_code=500, detail="AWS credentials missing")
+    except HTTPException as he:
+        raise he
     except Exception as e:
         logger.error(f"Upload failed: {e}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 
+@candidate_router.post("/upload-url", tags=["Candidate Management"])
+async def create_upload_url(
+        email: str = Query(...),
+        upload: UploadRequest = Body(...),
+        user: dict = Depends(get_current_user)
+):
+    """
+    Issues a presigned POST so the browser uploads a profile picture or education
+    document straight to S3. Call /confirm-upload with the returned key afterwards.
+    """
+    if upload.kind not in (UploadKind.PROFILE_PICTURE, UploadKind.EDUCATION_DOCUMENT):
+        raise HTTPException(status_code=400, detail=f"Upload kind {upload.kind.value} is not supported for candidates")
+
+    try:
+        candidate_id = await resolve_user_id("candidate", email)
+        await ensure_owner(user, candidate_id)
+        if not candidate_id:
+            raise HTTPException(status_code=404, detail="Candidate not found")
+
+        return generate_presigned_upload(upload.kind, candidate_id, upload.filename, upload.contentType)
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to create upload URL: {str(e)}")
+
+
+@candidate_router.post("/confirm-upload", tags=["Candidate Management"])
+async def confirm_upload(
+        background_tasks: BackgroundTasks,
+        email: str = Query(...),
+        confirmation: UploadConfirmation = Body(...),
+        user: dict = Depends(get_current_user)
+):
+    """
+    Records a finished direct upload on the candidate document.
+    """
+    try:
+        if confirmation.kind == UploadKind.EDUCATION_DOCUMENT and confirmation.index is None:
+            raise HTTPException(status_code=400, detail="index is required for education documents")
+        if confirmation.kind not in (UploadKind.PROFILE_PICTURE, UploadKind.EDUCATION_DOCUMENT):
+            raise HTTPException(status_code=400, detail=f"Upload kind {confirmation.kind.value} is not supported for candidates")
+
+        candidate_id = await resolve_user_id("candidate", email)
+        await ensure_owner(user, candidate_id)
+        if not candidate_id:
+            raise HTTPException(status_code=404, detail="Candidate not found")
+
+        if not await run_in_threadpool(verify_uploaded_object, confirmation.kind, candidate_id, confirmation.key):
+            raise HTTPException(status_code=400, detail="Upload not found")
+
+        file_key = confirmation.key
+        if confirmation.kind == UploadKind.PROFILE_PICTURE:
+            candidate_ref = db.collection("candidate").document(candidate_id)
+            await candidate_ref.update({"profilePicture": file_key, "profilePictureThumbnails": None})
+            background_tasks.add_task(store_thumbnails, candidate_ref, "profilePicture", file_key)
+            return {
+                "message": "Profile picture updated successfully",
+                "file_key": file_key,
+                "profilePictureSignedUrl": generate_signed_url(file_key)
+            }
+
+        await attach_education_file(db.collection("candidate").document(candidate_id), confirmation.index, file_key)
+        return {
+            "message": "Education file uploaded and updated successfully",
+            "file_key": file_key,
+            "fileUrlSigned": generate_signed_url(file_key)
+        }
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to confirm upload: {str(e)}")
+
+
 
 @candidate_router.put("/save-progress", tags=["Candidate Management"])
 async def save_progress(
         email: str = Query(..., example="user@example.com"),
-        progress_data: ProgressModel = Body(...)
+        progress_data: ProgressModel = Body(...),
+        user: dict = Depends(get_current_user)
 ):
     """
     Updates the progressSteps field for a candidate in Firestore by email.
     """
     try:
-        candidates_ref = db.collection("candidate")
-        query = candidates_ref.where("basicInfo.email", "==", email).stream()
-
-        candidate_docs = [doc for doc in query]
-        if not candidate_docs:
+        candidate_doc = await fetch_user_doc("candidate", email)
+        await ensure_owner(user, candidate_doc.id if candidate_doc else None)
+        if not candidate_doc:
             raise HTTPException(status_code=404, detail="Candidate not found")
 
-        candidate_doc = candidate_docs[0]
-        candidate_ref = candidates_ref.document(candidate_doc.id)
+        candidate_ref = candidate_doc.reference
 
         existing_progress = candidate_doc.to_dict().get("progressSteps", {})
 
@@ -254,7 +319,7 @@ async def save_progress(
             if step in existing_progress:
                 existing_progress[step].update(update_data.dict())
 
-        candidate_ref.update({"progressSteps": existing_progress})
+        await candidate_ref.update({"progressSteps": existing_progress})
 
         return JSONResponse(
             content={
@@ -273,36 +338,58 @@ async def save_progress(
         ) from e
 
 
-@candidate_router.get("/list-candidates", tags=["Candidate Management"])
-async def list_candidates():
-    candidates = db.collection("candidate").stream()
-    return [{"id": doc.id, **doc.to_dict()} for doc in candidates]
+@candidate_router.get("/list-candidates", tags=["Candidate Management"],
+                      dependencies=[Depends(require_user_type("employer", "admin"))])
+async def list_candidates(
+        fields: Optional[str] = Query(None, description="Comma separated field paths to return, e.g. basicInfo.firstName,status"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+        export: bool = Query(False, description="Stream every candidate as a JSON array instead of a page")
+):
+    candidates_ref = db.collection("candidate")
+    query = candidates_ref
+    field_paths = parse_fields(fields)
+    if field_paths:
+        query = query.select(field_paths)
+
+    if export:
+        docs = iter_documents(candidates_ref, query)
+        items = ({"id": doc.id, **doc.to_dict()} async for doc in docs)
+        return StreamingResponse(stream_json_array(items), media_type="application/json")
+
+    docs = await fetch_page(candidates_ref, limit, decode_cursor(cursor).get("id"), query)
+    next_cursor = encode_cursor({"id": docs[-1].id}) if len(docs) == limit else None
+
+    return {
+        "candidates": [{"id": doc.id, **doc.to_dict()} for doc in docs],
+        "next_cursor": next_cursor
+    }
 
 
 @candidate_router.put("/update-basic-info", tags=["Candidate Management"])
-async def update_basic_information(basic_info: BasicInformation = Body(...)):
+async def update_basic_information(
+        background_tasks: BackgroundTasks,
+        basic_info: BasicInformation = Body(...),
+        user: dict = Depends(get_current_user)
+):
     """
     Updates the 'basicInfo' field for a candidate in Firestore by email.
     """
     try:
-        candidates_ref = db.collection("candidate").where("basicInfo.email", "==", basic_info.email).stream()
-
-        candidate_doc = None
-        candidate_id = None
-
-        for doc in candidates_ref:
-            candidate_doc = doc.to_dict()
-            candidate_id = doc.id
-            break
-
-        if not candidate_doc:
+        candidate_id = await resolve_user_id("candidate", basic_info.email)
+        await ensure_owner(user, candidate_id)
+        if not candidate_id:
             raise HTTPException(status_code=404, detail=f"Candidate with email {basic_info.email} not found")
 
         candidate_ref = db.collection("candidate").document(candidate_id)
 
-        candidate_ref.update({
-            "basicInfo": basic_info.dict()
+        await candidate_ref.update({
+            "basicInfo": basic_info.dict(),
+            **email_key(basic_info.email)
         })
+        index_user("candidate", candidate_id, {"basicInfo": basic_info.dict()})
+        # Matching reads the candidate's city and country from basicInfo.
+        background_tasks.add_task(rematch_candidate, candidate_id)
 
         return JSONResponse(
             content={"message": "Basic information updated successfully"},
@@ -321,7 +408,8 @@ async def update_basic_information(basic_info: BasicInformation = Body(...)):
 @candidate_router.put("/education", tags=["Candidate Management"])
 async def update_education(
         email: str = Query(..., example="user@example.com"),
-        educationList: List[Education] = []
+        educationList: List[Education] = [],
+        user: dict = Depends(get_current_user)
 ):
     """
     Replaces the education field for a candidate in Firestore by email (idempotent PUT).
@@ -334,25 +422,24 @@ async def update_education(
         JSONResponse: A response indicating the success or failure of the update.
     """
     try:
-        candidates_ref = db.collection("candidate")
-        query = candidates_ref.where("basicInfo.email", "==", email).stream()
-
-        candidate_docs = [doc for doc in query]
-        if not candidate_docs:
+        candidate_id = await resolve_user_id("candidate", email)
+        await ensure_owner(user, candidate_id)
+        if not candidate_id:
             raise HTTPException(status_code=404, detail="Candidate not found")
 
-        candidate_doc = candidate_docs[0]
-        candidate_ref = candidates_ref.document(candidate_doc.id)
+        candidate_ref = db.collection("candidate").document(candidate_id)
 
         updated_education = [edu.dict() for edu in educationList]
 
-        candidate_ref.update({"education": updated_education})
+        await candidate_ref.update({"education": updated_education})
 
         return JSONResponse(
             content={"message": "Education data updated successfully", "education": updated_education},
             status_code=200
         )
 
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error updating education data: {str(e)}"
@@ -361,8 +448,10 @@ async def update_education(
 
 @candidate_router.put("/job-preference", tags=["Candidate Management"])
 async def update_job_preferences(
+        background_tasks: BackgroundTasks,
         email: str = Query(..., example="user@example.com"),
-        jobPreferences: List[JobPreference] = []
+        jobPreferences: List[JobPreference] = [],
+        user: dict = Depends(get_current_user)
 ):
     """
     Replaces the job preferences for a candidate by email (idempotent).
@@ -375,25 +464,25 @@ async def update_job_preferences(
         JSONResponse: A success or failure message.
     """
     try:
-        candidates_ref = db.collection("candidate")
-        query = candidates_ref.where("basicInfo.email", "==", email).stream()
-
-        candidate_docs = [doc for doc in query]
-        if not candidate_docs:
+        candidate_id = await resolve_user_id("candidate", email)
+        await ensure_owner(user, candidate_id)
+        if not candidate_id:
             raise HTTPException(status_code=404, detail="Candidate not found")
 
-        candidate_doc = candidate_docs[0]
-        candidate_ref = candidates_ref.document(candidate_doc.id)
+        candidate_ref = db.collection("candidate").document(candidate_id)
 
         updated_preferences = [job.dict() for job in jobPreferences]
 
-        candidate_ref.update({"jobPreference": updated_preferences})
+        await candidate_ref.update({"jobPreference": updated_preferences})
+        background_tasks.add_task(rematch_candidate, candidate_id)
 
         return JSONResponse(
             content={"message": "Job preferences updated successfully", "jobPreference": updated_preferences},
             status_code=200
         )
 
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error updating job preferences: {str(e)}"
@@ -403,24 +492,22 @@ async def update_job_preferences(
 @candidate_router.put("/work-experience", tags=["Candidate Management"])
 async def update_work_experience(
         email: str = Query(..., example="user@example.com"),
-        workExperienceList: List[WorkExperience] = Body(...)
+        workExperienceList: List[WorkExperience] = Body(...),
+        user: dict = Depends(get_current_user)
 ):
     """
     Replaces the work experience field for a candidate in Firestore by email (idempotent PUT).
     """
     try:
-        candidates_ref = db.collection("candidate")
-        query = candidates_ref.where("basicInfo.email", "==", email).stream()
-
-        candidate_docs = [doc for doc in query]
-        if not candidate_docs:
+        candidate_id = await resolve_user_id("candidate", email)
+        await ensure_owner(user, candidate_id)
+        if not candidate_id:
             raise HTTPException(status_code=404, detail="Candidate not found")
 
-        candidate_doc = candidate_docs[0]
-        candidate_ref = candidates_ref.document(candidate_doc.id)
+        candidate_ref = db.collection("candidate").document(candidate_id)
 
         updated_work_experience = [work.dict() for work in workExperienceList]
-        candidate_ref.update({"workExperience": updated_work_experience})
+        await candidate_ref.update({"workExperience": updated_work_experience})
 
         return JSONResponse(
             content={
@@ -430,6 +517,8 @@ async def update_work_experience(
             status_code=200
         )
 
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error updating work experience data: {str(e)}"
@@ -438,27 +527,29 @@ async def update_work_experience(
 
 @candidate_router.put("/skills", tags=["Candidate Management"])
 async def update_skills(
+        background_tasks: BackgroundTasks,
         email: str = Query(..., example="user@example.com"),
-        skills: List[str] = Body(...)
+        skills: List[str] = Body(...),
+        user: dict = Depends(get_current_user)
 ):
     try:
-        candidates_ref = db.collection("candidate")
-        query = candidates_ref.where("basicInfo.email", "==", email).stream()
-
-        candidate_docs = [doc for doc in query]
-        if not candidate_docs:
+        candidate_id = await resolve_user_id("candidate", email)
+        await ensure_owner(user, candidate_id)
+        if not candidate_id:
             raise HTTPException(status_code=404, detail="Candidate not found")
 
-        candidate_doc = candidate_docs[0]
-        candidate_ref = candidates_ref.document(candidate_doc.id)
+        candidate_ref = db.collection("candidate").document(candidate_id)
 
-        candidate_ref.update({"skills": skills})
+        await candidate_ref.update({"skills": skills, "skillIds": skill_ids(skills)})
+        background_tasks.add_task(rematch_candidate, candidate_id)
 
         return JSONResponse(
             content={"message": "Skills updated successfully", "skills": skills},
             status_code=200
         )
 
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error updating skills: {str(e)}"
@@ -468,7 +559,8 @@ async def update_skills(
 @candidate_router.put("/projects", tags=["Candidate Management"])
 async def update_projects(
         email: str = Query(..., example="user@example.com"),
-        projects: List[Projects] = Body(...)
+        projects: List[Projects] = Body(...),
+        user: dict = Depends(get_current_user)
 ):
     """
     Replaces the projects field for a candidate in Firestore by email (idempotent PUT).
@@ -481,19 +573,16 @@ async def update_projects(
         JSONResponse: A response indicating the success or failure of the update.
     """
     try:
-        candidates_ref = db.collection("candidate")
-        query = candidates_ref.where("basicInfo.email", "==", email).stream()
-
-        candidate_docs = [doc for doc in query]
-        if not candidate_docs:
+        candidate_id = await resolve_user_id("candidate", email)
+        await ensure_owner(user, candidate_id)
+        if not candidate_id:
             raise HTTPException(status_code=404, detail="Candidate not found")
 
-        candidate_doc = candidate_docs[0]
-        candidate_ref = candidates_ref.document(candidate_doc.id)
+        candidate_ref = db.collection("candidate").document(candidate_id)
 
         updated_projects = [project.dict() for project in projects]
 
-        candidate_ref.update({"projects": updated_projects})
+        await candidate_ref.update({"projects": updated_projects})
 
         return JSONResponse(
             content={
@@ -503,6 +592,8 @@ async def update_projects(
             status_code=200
         )
 
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error updating projects: {str(e)}"
@@ -512,7 +603,8 @@ async def update_projects(
 @candidate_router.put("/awards", tags=["Candidate Management"])
 async def update_awards(
         email: str = Query(..., example="user@example.com"),
-        awards: List[Awards] = Body(...)
+        awards: List[Awards] = Body(...),
+        user: dict = Depends(get_current_user)
 ):
     """
     Replaces the awards field for a candidate in Firestore by email (idempotent PUT).
@@ -525,18 +617,15 @@ async def update_awards(
         JSONResponse: A response indicating success or failure.
     """
     try:
-        candidates_ref = db.collection("candidate")
-        query = candidates_ref.where("basicInfo.email", "==", email).stream()
-
-        candidate_docs = [doc for doc in query]
-        if not candidate_docs:
+        candidate_id = await resolve_user_id("candidate", email)
+        await ensure_owner(user, candidate_id)
+        if not candidate_id:
             raise HTTPException(status_code=404, detail="Candidate not found")
 
-        candidate_doc = candidate_docs[0]
-        candidate_ref = candidates_ref.document(candidate_doc.id)
+        candidate_ref = db.collection("candidate").document(candidate_id)
 
         updated_awards = [award.dict() for award in awards]
-        candidate_ref.update({"awards": updated_awards})
+        await candidate_ref.update({"awards": updated_awards})
 
         return JSONResponse(
             content={
@@ -546,6 +635,8 @@ async def update_awards(
             status_code=200
         )
 
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -556,7 +647,8 @@ async def update_awards(
 @candidate_router.put("/awards", tags=["Candidate Management"])
 async def update_awards(
         email: str = Query(..., example="user@example.com"),
-        awards: List[Awards] = Body(...)
+        awards: List[Awards] = Body(...),
+        user: dict = Depends(get_current_user)
 ):
     """
     Replaces the awards field for a candidate in Firestore by email (idempotent PUT).
@@ -569,18 +661,15 @@ async def update_awards(
         JSONResponse: A response indicating success or failure.
     """
     try:
-        candidates_ref = db.collection("candidate")
-        query = candidates_ref.where("basicInfo.email", "==", email).stream()
-
-        candidate_docs = [doc for doc in query]
-        if not candidate_docs:
+        candidate_id = await resolve_user_id("candidate", email)
+        await ensure_owner(user, candidate_id)
+        if not candidate_id:
             raise HTTPException(status_code=404, detail="Candidate not found")
 
-        candidate_doc = candidate_docs[0]
-        candidate_ref = candidates_ref.document(candidate_doc.id)
+        candidate_ref = db.collection("candidate").document(candidate_id)
 
         updated_awards = [award.dict() for award in awards]
-        candidate_ref.update({"awards": updated_awards})
+        await candidate_ref.update({"awards": updated_awards})
 
         return JSONResponse(
             content={
@@ -590,6 +679,8 @@ async def update_awards(
             status_code=200
         )
 
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -597,26 +688,93 @@ async def update_awards(
         ) from e
 
 
+@candidate_router.patch("/profile", tags=["Candidate Management"])
+async def update_profile(
+        background_tasks: BackgroundTasks,
+        email: str = Query(..., example="user@example.com"),
+        profile: CandidateProfileUpdate = Body(...),
+        user: dict = Depends(get_current_user)
+):
+    """
+    Applies any subset of the onboarding sections (basic info, education, work experience,
+    job preference, skills, projects, awards and progress steps) in a single atomic write.
+
+    Args:
+        email (str): The email of the candidate to update.
+        profile (CandidateProfileUpdate): The sections to replace.
+
+    Returns:
+        JSONResponse: The list of sections that were written.
+    """
+    try:
+        sections = profile.dict(exclude_unset=True, exclude_none=True)
+        progress_steps = sections.pop("progressSteps", None)
+        if not sections and not progress_steps:
+            raise HTTPException(status_code=400, detail="No profile sections provided")
+
+        candidate_id = await resolve_user_id("candidate", email)
+        await ensure_owner(user, candidate_id)
+        if not candidate_id:
+            raise HTTPException(status_code=404, detail="Candidate not found")
+
+        updates = dict(sections)
+        if "skills" in sections:
+            updates["skillIds"] = skill_ids(sections["skills"])
+        if "basicInfo" in sections:
+            updates.update(email_key(sections["basicInfo"].get("email")))
+
+        # Progress steps are merged per step (like /save-progress) via field paths,
+        # so no read of the existing document is needed.
+        default_steps = ProgressModel.default_steps()
+        for step, step_data in (progress_steps or {}).items():
+            if step in default_steps:
+                updates[db.field_path("progressSteps", step)] = step_data
+
+        await db.collection("candidate").document(candidate_id).update(updates)
+        index_user("candidate", candidate_id, sections)
+        if {"skills", "jobPreference", "basicInfo"} & set(sections):
+            background_tasks.add_task(rematch_candidate, candidate_id)
+
+        new_email = sections.get("basicInfo", {}).get("email")
+        if new_email and normalize_email(new_email) != normalize_email(email):
+            forget_user_id("candidate", email)
+            remember_user_id("candidate", new_email, candidate_id)
+
+        return JSONResponse(
+            content={
+                "message": "Profile updated successfully",
+                "updated": list(sections) + (["progressSteps"] if progress_steps else [])
+            },
+            status_code=200
+        )
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error updating profile: {str(e)}"
+        ) from e
+
+
 @candidate_router.put("/account-settings", tags=["Candidate Management"])
 async def update_account_settings(
         email: str = Query(...),
-        account: Account = Body(...)
+        account: Account = Body(...),
+        user: dict = Depends(get_current_user)
 ):
     """
     Updates account-related settings for the candidate.
     """
     try:
-        candidates_ref = db.collection("candidate")
-        query = candidates_ref.where("basicInfo.email", "==", email).stream()
-        candidate_docs = [doc for doc in query]
-
-        if not candidate_docs:
+        candidate_id = await resolve_user_id("candidate", email)
+        await ensure_owner(user, candidate_id)
+        if not candidate_id:
             raise HTTPException(status_code=404, detail="Candidate not found")
 
-        candidate_doc = candidate_docs[0]
-        candidate_ref = candidates_ref.document(candidate_doc.id)
+        candidate_ref = db.collection("candidate").document(candidate_id)
 
-        candidate_ref.update({
+        await candidate_ref.update({
             "account": account.dict()
         })
 
@@ -625,50 +783,37 @@ async def update_account_settings(
             status_code=200
         )
 
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@candidate_router.put("/account-settings", tags=["Candidate Management"])
-def match_candidates_to_job(job: JobModel, employer: EmployerProfile, candidate_list: list[dict]) -> list[MatchedJob]:
-    matched_candidates = []
-
-    for candidate in candidate_list:
-        candidate_skills = candidate.get('skills', [])
-
-        # Simple skill match check (can be replaced with more advanced logic)
-        skill_match = any(skill in job.skills for skill in candidate_skills)
-
-        if skill_match:
-            matched_job = MatchedJob(
-                candidate_email=candidate['email'],
-                job_id=job.id,
-                job_title=job.title,
-                company_name=employer.companyName or "Unknown Company",
-                description=job.description,
-                tags=[
-                    job.employment_type.value,
-                    job.experience_level or "",
-                    "Remote" if job.location == "remote" else "On-site"
-                ],
-                salary=f"R{job.salary_min} - R{job.salary_max}" if job.salary_min and job.salary_max else None,
-                matched_on=datetime.utcnow(),
-                status="pending",
-                job_accepted="no"  # Default value
-            )
-            matched_candidates.append(matched_job)
-
-    return matched_candidates
-
-
-@candidate_router.post("/generate-resume-html-pdf")
-def generate_resume(request: ResumeRequest):
-    candidate = fetch_candidate_by_email(request.email)
-    if not candidate:
-        raise HTTPException(status_code=404, detail="Candidate not found")
-
-    template = env.get_template("resume_template.html")
-    html_content = template.render(
+async def match_candidates_to_job(job: JobModel, employer: EmployerProfile, candidate_list: list[dict],
+                                  job_id: str = "", top_k: int = DEFAULT_TOP_K,
+                                  min_score: float = DEFAULT_MIN_SCORE) -> list[MatchedJob]:
+    """
+    Returns the `top_k` best matching candidates for `job`, best first, scored by
+    weighted skill overlap, among candidates whose salary and location preferences
+    fit the job. Candidates without an "id" are keyed by position.
+    """
+    index = SkillIndex()
+    preferences = PreferenceIndex()
+    candidates = {}
+    for position, candidate in enumerate(candidate_list):
+        candidate_id = candidate.get("id") or str(position)
+        candidates[candidate_id] = candidate
+        index.add(candidate_id, skill_ids_of(candidate, "skillIds"))
+        preferences.add(candidate_id, candidate_preferences(candidate))
+
+    job_skill_ids = skill_ids_of({"skills": job.skills}, "skill_ids")
+    return match_job(job, job_id, job_skill_ids, employer, candidates, index, top_k, min_score,
+                     preferences.eligible(job_requirements(job)))
+
+
+def resume_context(candidate: dict) -> dict:
+    """Collects exactly the values resume_template.html renders."""
+    return dict(
         name=f"{candidate['basicInfo'].get('firstName', '')} {candidate['basicInfo'].get('lastName', '')}",
         email=candidate['basicInfo'].get('email', ''),
         role=candidate['basicInfo'].get('role', ''),
@@ -678,13 +823,44 @@ def generate_resume(request: ResumeRequest):
         projects=candidate.get('projects', []),
     )
 
+
+def render_resume_pdf(context: dict) -> bytes:
+    template = env.get_template("resume_template.html")
+    html_content = template.render(**context)
+
     pdf_buffer = io.BytesIO()
     HTML(string=html_content).write_pdf(pdf_buffer)
-    pdf_buffer.seek(0)
+    return pdf_buffer.getvalue()
 
-    return StreamingResponse(
-        pdf_buffer,
-        media_type="application/pdf",
-        headers={"Content-Disposition": "attachment; filename=resume.pdf"}
-    )
+
+# Part of every cache key, so editing the template invalidates cached PDFs.
+RESUME_TEMPLATE_VERSION = hashlib.sha256(
+    env.loader.get_source(env, "resume_template.html")[0].encode()
+).hexdigest()
+
+
+@candidate_router.post("/generate-resume-html-pdf")
+async def generate_resume(request: ResumeRequest, if_none_match: Optional[str] = Header(None), user: dict = Depends(get_current_user)):
+    candidate = await fetch_candidate_by_email(request.email)
+    await ensure_owner(user, candidate["id"] if candidate else None, "employer")
+    if not candidate:
+        raise HTTPException(status_code=404, detail="Candidate not found")
+
+    context = resume_context(candidate)
+    digest = resume_digest(context, RESUME_TEMPLATE_VERSION)
+    headers = {
+        "Content-Disposition": "attachment; filename=resume.pdf",
+        "ETag": f'"{digest}"'
+    }
+
+    if if_none_match == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+
+    pdf = await run_in_threadpool(resume_cache.get, digest)
+    if pdf is None:
+        # Rendering is CPU bound; keep it off the event loop.
+        pdf = await run_in_threadpool(render_resume_pdf, context)
+        await run_in_threadpool(resume_cache.put, digest, pdf)
+
+    return Response(content=pdf, media_type="application/pdf", headers=headers)
 
@@ -1,29 +1,30 @@
-from fastapi import APIRouter, UploadFile, File, Body, HTTPException, Query
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, Body, HTTPException, Query, BackgroundTasks, Depends
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional, List
-from firebase_admin import firestore
-import boto3
-from botocore.config import Config
 from botocore.exceptions import NoCredentialsError
 
 from app.models.employer import EmployerProfile
-from app.utils.s3_helpers import upload_file_to_s3, generate_signed_url
-from app.settings import settings
+from app.models.models import UploadRequest, UploadConfirmation
+from app.models.shared import UploadKind, ImageSize, ImageFormat
+from app.utils.s3_helpers import generate_signed_url, generate_signed_urls, \
+    generate_presigned_upload, verify_uploaded_object, upload_image_to_s3, pick_image_key
+from app.auth import get_current_user, ensure_owner
+from app.utils.email_index import resolve_user_id, fetch_user_doc, remember_user_id, forget_user_id, \
+    normalize_email, email_key
+from app.utils.firestore_helpers import parse_fields, store_thumbnails
+from app.services.skill_service import skill_ids
+from app.services.search_service import index_user
+from app.utils.pagination import DEFAULT_PAGE_SIZE, EXPORT_BATCH_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor, fetch_page, \
+    iter_documents, stream_json_array
 from pydantic import BaseModel, EmailStr
 
 import logging
 logger = logging.getLogger("uvicorn")
 
-employer_router = APIRouter()
-db = firestore.client()
+from app.firebase import db
 
-s3_client = boto3.client(
-    "s3",
-    region_name=settings.aws_region,
-    aws_access_key_id=settings.aws_access_key,
-    aws_secret_access_key=settings.aws_secret_key,
-    config=Config(signature_version="s3v4", s3={'addressing_style': 'virtual'})
-)
+employer_router = APIRouter()
 
 
 class JobPost(BaseModel):
@@ -37,39 +38,45 @@ class JobPost(BaseModel):
 
 
 @employer_router.put("/update-company-info", tags=["Employer Management"])
-async def update_company_info(data: EmployerProfile):
+async def update_company_info(data: EmployerProfile, user: dict = Depends(get_current_user)):
     try:
-        ref = db.collection("employer")
-        query = ref.where("email", "==", data.email).stream()
-
-        employer_docs = [doc for doc in query]
-        if not employer_docs:
+        employer_id = await resolve_user_id("employer", data.email)
+        await ensure_owner(user, employer_id)
+        if not employer_id:
             raise HTTPException(status_code=404, detail="Employer not found")
 
-        employer_ref = ref.document(employer_docs[0].id)
-        employer_ref.update(data.dict())
+        employer_ref = db.collection("employer").document(employer_id)
+        await employer_ref.update({**data.dict(), **email_key(data.email)})
+        index_user("employer", employer_id, data.dict())
 
         return {"message": "Company information updated successfully"}
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update company info: {str(e)}")
 
 
 @employer_router.get("/get-company-info", tags=["Employer Management"])
-async def get_company_info(email: str = Query(...)):
+async def get_company_info(
+        email: str = Query(...),
+        fields: Optional[str] = Query(None, description="Comma separated field paths to return, e.g. companyName,logo"),
+        imageSize: Optional[ImageSize] = Query(None, description="Thumbnail size for profilePictureSignedUrl; omit for the original"),
+        imageFormat: ImageFormat = Query(ImageFormat.WEBP)
+):
     try:
         logger.info(f"Fetching employer with email: {email}")
-        ref = db.collection("employer")
-        query = ref.where("email", "==", email.lower()).stream()
-
-        docs = list(query)
-        logger.info(f"Found docs: {[doc.id for doc in docs]}")
+        field_paths = parse_fields(fields)
+        if field_paths and "profilePictureSignedUrl" in field_paths:
+            field_paths = [path for path in field_paths if path != "profilePictureSignedUrl"] + \
+                          ["profilePicture", "profilePictureThumbnails"]
 
-        if not docs:
+        doc = await fetch_user_doc("employer", email, field_paths=field_paths)
+        if not doc:
             raise HTTPException(status_code=404, detail="Employer not found")
 
-        data = docs[0].to_dict()
+        data = doc.to_dict()
 
-        profile_key = data.get("profilePicture")
+        profile_key = pick_image_key(data, "profilePicture", imageSize, imageFormat)
         if profile_key:
             data["profilePictureSignedUrl"] = generate_signed_url(profile_key)
 
@@ -80,42 +87,117 @@ async def get_company_info(email: str = Query(...)):
 
 
 @employer_router.post("/upload-logo", tags=["Employer Management"])
-async def upload_logo(email: str = Query(...), file: UploadFile = File(...)):
+async def upload_logo(email: str = Query(...), file: UploadFile = File(...), user: dict = Depends(get_current_user)):
     try:
-        file_url = upload_file_to_s3(file, folder="company-logos")
-        file_key = file_url.split(".com/")[-1]
-
-        ref = db.collection("employer")
-        query = ref.where("email", "==", email).stream()
-        docs = [doc for doc in query]
-
-        if not docs:
+        employer_id = await resolve_user_id("employer", email)
+        await ensure_owner(user, employer_id)
+        if not employer_id:
             raise HTTPException(status_code=404, detail="Employer not found")
 
-        ref.document(docs[0].id).update({"logo": file_key})
+        file_key, thumbnails = await run_in_threadpool(upload_image_to_s3, file, "company-logos")
+
+        await db.collection("employer").document(employer_id).update({"logo": file_key, "logoThumbnails": thumbnails})
 
         return {"message": "Logo uploaded successfully", "logoUrl": generate_signed_url(file_key)}
 
     except NoCredentialsError:
         raise HTTPException(status_code=500, detail="AWS credentials not found")
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@employer_router.post("/post-job", tags=["Employer Management"])
-async def post_job(email: str = Query(...), job: JobPost = Body(...)):
+# Direct uploads: the Firestore field each upload kind is recorded on.
+EMPLOYER_UPLOAD_FIELDS = {
+    UploadKind.COMPANY_LOGO: "logo",
+    UploadKind.PROFILE_PICTURE: "profilePicture",
+}
+
+
+@employer_router.post("/upload-url", tags=["Employer Management"])
+async def create_upload_url(
+        email: str = Query(...),
+        upload: UploadRequest = Body(...),
+        user: dict = Depends(get_current_user)
+):
+    """
+    Issues a presigned POST so the browser uploads a logo or profile picture
+    straight to S3. Call /confirm-upload with the returned key afterwards.
+    """
+    if upload.kind not in EMPLOYER_UPLOAD_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Upload kind {upload.kind.value} is not supported for employers")
+
     try:
-        ref = db.collection("employer")
-        query = ref.where("email", "==", email).stream()
-        docs = [doc for doc in query]
+        employer_id = await resolve_user_id("employer", email)
+        await ensure_owner(user, employer_id)
+        if not employer_id:
+            raise HTTPException(status_code=404, detail="Employer not found")
+
+        return generate_presigned_upload(upload.kind, employer_id, upload.filename, upload.contentType)
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to create upload URL: {str(e)}")
+
+
+@employer_router.post("/confirm-upload", tags=["Employer Management"])
+async def confirm_upload(
+        background_tasks: BackgroundTasks,
+        email: str = Query(...),
+        confirmation: UploadConfirmation = Body(...),
+        user: dict = Depends(get_current_user)
+):
+    """
+    Records a finished direct upload on the employer document.
+    """
+    field = EMPLOYER_UPLOAD_FIELDS.get(confirmation.kind)
+    if not field:
+        raise HTTPException(status_code=400, detail=f"Upload kind {confirmation.kind.value} is not supported for employers")
 
-        if not docs:
+    try:
+        employer_id = await resolve_user_id("employer", email)
+        await ensure_owner(user, employer_id)
+        if not employer_id:
+            raise HTTPException(status_code=404, detail="Employer not found")
+
+        if not await run_in_threadpool(verify_uploaded_object, confirmation.kind, employer_id, confirmation.key):
+            raise HTTPException(status_code=400, detail="Upload not found")
+
+        employer_ref = db.collection("employer").document(employer_id)
+        await employer_ref.update({field: confirmation.key, f"{field}Thumbnails": None})
+        background_tasks.add_task(store_thumbnails, employer_ref, field, confirmation.key)
+
+        return {
+            "message": "Upload saved successfully",
+            "file_key": confirmation.key,
+            "signedUrl": generate_signed_url(confirmation.key)
+        }
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to confirm upload: {str(e)}")
+
+
+@employer_router.post("/post-job", tags=["Employer Management"])
+async def post_job(email: str = Query(...), job: JobPost = Body(...), user: dict = Depends(get_current_user)):
+    try:
+        employer_id = await resolve_user_id("employer", email)
+        await ensure_owner(user, employer_id)
+        if not employer_id:
             raise HTTPException(status_code=404, detail="Employer not found")
 
-        employer_id = docs[0].id
         jobs_ref = db.collection("employer").document(employer_id).collection("jobs")
-        jobs_ref.add(job.dict())
+        job_dict = job.dict()
+        job_dict["skillIds"] = skill_ids(job.skills)
+        await jobs_ref.add(job_dict)
 
         return {"message": "Job posted successfully"}
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to post job: {str(e)}")
 
@@ -123,19 +205,15 @@ async def post_job(email: str = Query(...), job: JobPost = Body(...)):
 @employer_router.get("/jobs", tags=["Employer Management"])
 async def list_jobs(email: str = Query(...), jobType: Optional[str] = None, location: Optional[str] = None):
     try:
-        ref = db.collection("employer")
-        query = ref.where("email", "==", email).stream()
-        docs = [doc for doc in query]
-
-        if not docs:
+        employer_id = await resolve_user_id("employer", email)
+        if not employer_id:
             raise HTTPException(status_code=404, detail="Employer not found")
 
-        employer_id = docs[0].id
         jobs_ref = db.collection("employer").document(employer_id).collection("jobs")
         jobs_query = jobs_ref.stream()
 
         jobs = []
-        for doc in jobs_query:
+        async for doc in jobs_query:
             job = doc.to_dict()
             if (not jobType or job["jobType"] == jobType) and (not location or job["location"] == location):
                 jobs.append({"id": doc.id, **job})
@@ -148,46 +226,79 @@ async def list_jobs(email: str = Query(...), jobType: Optional[str] = None, loca
 @employer_router.put("/update-employer-profile", tags=["Employer Management"])
 async def update_employer_profile(
         email: str = Query(..., example="company@gmail.com"),
-        profile_data: EmployerProfile = Body(...)
+        profile_data: EmployerProfile = Body(...),
+        user: dict = Depends(get_current_user)
 ):
     try:
-        employers_ref = db.collection("employer")
-        query = employers_ref.where("email", "==", email).stream()
-
-        employer_docs = [doc for doc in query]
-        if not employer_docs:
+        employer_id = await resolve_user_id("employer", email)
+        await ensure_owner(user, employer_id)
+        if not employer_id:
             raise HTTPException(status_code=404, detail="Employer not found")
 
-        employer_doc = employer_docs[0]
-        employer_ref = employers_ref.document(employer_doc.id)
+        employer_ref = db.collection("employer").document(employer_id)
 
-        employer_ref.update(profile_data.dict(exclude_unset=True))
+        update_data = profile_data.dict(exclude_unset=True)
+        await employer_ref.update({**update_data, **email_key(update_data.get("email"))})
+        index_user("employer", employer_id, update_data)
+
+        new_email = update_data.get("email")
+        if new_email and normalize_email(new_email) != normalize_email(email):
+            forget_user_id("employer", email)
+            remember_user_id("employer", new_email, employer_id)
 
         return JSONResponse(
             content={"message": "Employer profile updated successfully."},
             status_code=200
         )
 
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating employer profile: {str(e)}")
 
 
 @employer_router.get("/get-all-employers", tags=["Employer Management"])
-async def get_all_employers():
+async def get_all_employers(
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+        export: bool = Query(False, description="Stream every employer as a JSON array instead of a page"),
+        logoSize: Optional[ImageSize] = Query(ImageSize.SMALL, description="Thumbnail size for logoUrl; omit for the original"),
+        imageFormat: ImageFormat = Query(ImageFormat.WEBP)
+):
+    def to_employers(docs):
+        employers = [{**doc.to_dict(), "id": doc.id} for doc in docs]
+        logo_keys = {data["id"]: pick_image_key(data, "logo", logoSize, imageFormat) for data in employers}
+        signed_urls = generate_signed_urls(logo_keys.values())
+        for data in employers:
+            if logo_keys[data["id"]]:
+                data["logoUrl"] = signed_urls[logo_keys[data["id"]]]
+        return employers
+
     try:
         employers_ref = db.collection("employer")
-        docs = employers_ref.stream()
-
-        employers = []
-        for doc in docs:
-            data = doc.to_dict()
-            logo_key = data.get("logo")
-            if logo_key:
-                data["logoUrl"] = generate_signed_url(logo_key)
-            data["id"] = doc.id
-            employers.append(data)
-
-        return JSONResponse(content=employers)
+
+        if export:
+            async def all_employers():
+                batch = []
+                async for doc in iter_documents(employers_ref):
+                    batch.append(doc)
+                    if len(batch) == EXPORT_BATCH_SIZE:
+                        for data in to_employers(batch):
+                            yield data
+                        batch = []
+                for data in to_employers(batch):
+                    yield data
+            return StreamingResponse(stream_json_array(all_employers()), media_type="application/json")
+
+        docs = await fetch_page(employers_ref, limit, decode_cursor(cursor).get("id"))
+        employers = to_employers(docs)
+
+        return JSONResponse(content={
+            "employers": employers,
+            "next_cursor": encode_cursor({"id": docs[-1].id}) if len(docs) == limit else None
+        })
+    except HTTPException as he:
+        raise he
     except Exception as e:
         logger.error(f"Error retrieving all employers: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch employers")
@@ -196,22 +307,21 @@ async def get_all_employers():
 @employer_router.post("/update-picture", tags=["Employer Management"])
 async def upload_image(
         email: str = Query(...),
-        file: UploadFile = File(...)
+        file: UploadFile = File(...),
+        user: dict = Depends(get_current_user)
 ):
     try:
-        file_url = upload_file_to_s3(file, folder="profile-pictures")
-
-        file_key = file_url.split(".com/")[-1]
-
-        candidates_ref = db.collection("employer")
-        query = candidates_ref.where("email", "==", email).stream()
-        candidate_docs = [doc for doc in query]
-
-        if not candidate_docs:
+        employer_id = await resolve_user_id("employer", email)
+        await ensure_owner(user, employer_id)
+        if not employer_id:
             raise HTTPException(status_code=404, detail="Employer not found")
 
-        candidate_ref = candidates_ref.document(candidate_docs[0].id)
-        candidate_ref.update({"profilePicture": file_key})
+        file_key, thumbnails = await run_in_threadpool(upload_image_to_s3, file, "profile-pictures")
+
+        await db.collection("employer").document(employer_id).update({
+            "profilePicture": file_key,
+            "profilePictureThumbnails": thumbnails
+        })
 
         signed_url = generate_signed_url(file_key)
 
@@ -223,5 +333,7 @@ async def upload_image(
 
     except NoCredentialsError:
         return {"error": "Credentials not available"}
+    except HTTPException as he:
+        raise he
     except Exception as e:
         return {"error": str(e)}
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""
+Serves and accepts files for the local storage backend (STORAGE_BACKEND=local).
+URLs are produced by LocalStorage.sign / presign_post and checked here, mirroring
+S3 presigned GET and POST so the rest of the app works the same without AWS.
+"""
+
+import os
+
+from fastapi import APIRouter, HTTPException, Query, Form, File, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response
+
+from app.services.storage_service import storage, LocalStorage
+
+router = APIRouter()
+
+
+def _local_storage() -> LocalStorage:
+    if not isinstance(storage, LocalStorage):
+        raise HTTPException(status_code=404, detail="Not found")
+    return storage
+
+
+@router.get("/files/{key:path}", tags=["Files"])
+async def download_file(key: str, expires: int = Query(...), signature: str = Query(...)):
+    local = _local_storage()
+    if not local.verify(signature, expires, "GET", key):
+        raise HTTPException(status_code=403, detail="Invalid or expired signature")
+
+    try:
+        path = local.path(key)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid key")
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    return FileResponse(path)
+
+
+@router.post("/files", tags=["Files"])
+async def upload_file(
+        key: str = Form(...),
+        content_type: str = Form(..., alias="Content-Type"),
+        max_bytes: int = Form(..., alias="maxBytes"),
+        expires: int = Form(...),
+        signature: str = Form(...),
+        file: UploadFile = File(...)
+):
+    local = _local_storage()
+    if not local.verify(signature, expires, "POST", key, content_type, max_bytes):
+        raise HTTPException(status_code=403, detail="Invalid or expired signature")
+
+    file.file.seek(0, os.SEEK_END)
+    size = file.file.tell()
+    file.file.seek(0)
+    if size < 1 or size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"File must be between 1 and {max_bytes} bytes")
+
+    try:
+        await run_in_threadpool(local.upload, file.file, key, content_type)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid key")
+
+    # Same as S3's default success_action_status
+    return Response(status_code=204)
@@ -1,24 +1,42 @@
 
-from fastapi import APIRouter, Body, HTTPException, status, Request
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Body, HTTPException, status, BackgroundTasks, Query, Depends
+from fastapi.responses import JSONResponse, Response
 from datetime import datetime, date
+from app.auth import get_current_user, require_user_type
 from app.firebase import db
-from app.models.jobs import JobModel
-from typing import Optional
+from app.models.jobs import JobModel, EmploymentType, Status
+from app.services.matching_service import rematch_job
+from app.services.skill_service import skill_ids
+from app.services.job_search_service import get_job_index, index_job
+from app.utils.firestore_helpers import parse_fields
+from app.utils.response_cache import response_cache, render_json, json_bytes_response
+from app.utils.pagination import DOCUMENT_ID, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, cursor_offset, \
+    decode_cursor, encode_cursor
+from typing import List, Optional
 
 
 router = APIRouter()
 
+# Response cache tags: every listing page, one job, one employer's jobs.
+JOBS_TAG = "jobs"
+
+
+def job_tag(job_id: str) -> str:
+    return f"job:{job_id}"
+
+
+def employer_jobs_tag(employer_id: str) -> str:
+    return f"employer-jobs:{employer_id}"
+
+
 @router.post("/jobs", tags=["Jobs"])
 async def create_job(
+        background_tasks: BackgroundTasks,
         job_data: JobModel = Body(...),
-        request: Request = None  # Assuming request holds user session or token
+        user: dict = Depends(require_user_type("employer"))
 ):
     try:
-        # Example of getting the employer UID from headers (customize for your auth)
-        employer_uid = request.headers.get("X-User-Uid")  # Or from token/session
-        if not employer_uid:
-            raise HTTPException(status_code=401, detail="Employer UID missing")
+        employer_uid = user["uid"]
 
         doc_ref = db.collection("jobs").document()
         job_dict = job_data.dict()
@@ -26,6 +44,7 @@ async def create_job(
         # Override employer_id from auth instead of trusting client data
         job_dict["employer_id"] = employer_uid
         job_dict["job_id"] = doc_ref.id
+        job_dict["skill_ids"] = skill_ids(job_dict.get("skills"))
 
         if isinstance(job_dict.get("application_close_date"), date):
             job_dict["application_close_date"] = datetime.combine(
@@ -34,7 +53,10 @@ async def create_job(
 
         job_dict["created_at"] = datetime.utcnow().isoformat()
 
-        doc_ref.set(job_dict)
+        await doc_ref.set(job_dict)
+        response_cache.invalidate(JOBS_TAG, employer_jobs_tag(employer_uid))
+        index_job(doc_ref.id, job_dict)
+        background_tasks.add_task(rematch_job, doc_ref.id)
 
         return JSONResponse(
             content={"message": "Job created successfully", "id": doc_ref.id},
@@ -50,16 +72,15 @@ async def create_job(
 @router.put("/jobs/{job_id}", tags=["Jobs"])
 async def update_job(
         job_id: str,
+        background_tasks: BackgroundTasks,
         job_data: JobModel = Body(...),
-        request: Request = None
+        user: dict = Depends(get_current_user)
 ):
     try:
-        employer_uid = request.headers.get("X-User-Uid")
-        if not employer_uid:
-            raise HTTPException(status_code=401, detail="Employer UID missing")
+        employer_uid = user["uid"]
 
         doc_ref = db.collection("jobs").document(job_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
 
         if not doc.exists:
             raise HTTPException(status_code=404, detail="Job not found")
@@ -69,6 +90,8 @@ async def update_job(
             raise HTTPException(status_code=403, detail="Unauthorized to update this job")
 
         job_dict = job_data.dict(exclude_unset=True)  # Only include provided fields
+        if "skills" in job_dict:
+            job_dict["skill_ids"] = skill_ids(job_dict["skills"])
 
         if "application_close_date" in job_dict and isinstance(job_dict["application_close_date"], date):
             job_dict["application_close_date"] = datetime.combine(
@@ -77,7 +100,10 @@ async def update_job(
 
         job_dict["updated_at"] = datetime.utcnow().isoformat()
 
-        doc_ref.update(job_dict)
+        await doc_ref.update(job_dict)
+        response_cache.invalidate(JOBS_TAG, job_tag(job_id), employer_jobs_tag(employer_uid))
+        index_job(job_id, {**existing_data, **job_dict})
+        background_tasks.add_task(rematch_job, job_id)
 
         return JSONResponse(
             content={"message": "Job updated successfully"},
@@ -91,32 +117,59 @@ async def update_job(
 
 
 @router.get("/jobs", tags=["Jobs"])
-async def get_jobs(limit: int = 50, start_after: Optional[str] = None):
+async def get_jobs(
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+        fields: Optional[str] = None
+):
+    """
+    Lists jobs newest first. The cursor carries the last job's (created_at, id), so
+    each page is a single query and stays stable while new jobs are posted.
+    """
+    cache_key = ("jobs", limit, cursor, fields)
+    body = response_cache.get(cache_key)
+    if body is not None:
+        return json_bytes_response(body, "HIT")
+    generation = response_cache.generation()
+
     try:
-        jobs_ref = db.collection("jobs").order_by("created_at", direction="DESCENDING").limit(limit)
+        jobs_collection = db.collection("jobs")
+        jobs_ref = jobs_collection.order_by("created_at", direction="DESCENDING") \
+            .order_by(DOCUMENT_ID, direction="DESCENDING").limit(limit)
 
-        if start_after:
-            start_doc = db.collection("jobs").document(start_after).get()
-            if start_doc.exists:
-                jobs_ref = jobs_ref.start_after(start_doc)
+        field_paths = parse_fields(fields)
+        if field_paths:
+            jobs_ref = jobs_ref.select(list(dict.fromkeys(field_paths + ["created_at"])))
 
-        docs = jobs_ref.stream()
+        state = decode_cursor(cursor)
+        if state:
+            if "created_at" not in state or not state.get("id"):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            jobs_ref = jobs_ref.start_after({
+                "created_at": state["created_at"],
+                DOCUMENT_ID: jobs_collection.document(state["id"])
+            })
+
+        docs = [doc async for doc in jobs_ref.stream()]
 
         jobs = []
         for doc in docs:
             job_data = doc.to_dict()
-            for key, value in job_data.items():
-                if isinstance(value, datetime):
-                    job_data[key] = value.isoformat()
-
+            if field_paths and "created_at" not in field_paths:
+                job_data.pop("created_at", None)
             job_data["job_id"] = doc.id
             jobs.append(job_data)
 
-        return JSONResponse(
-            content={"jobs": jobs},
-            status_code=status.HTTP_200_OK
-        )
+        next_cursor = None
+        if len(docs) == limit:
+            next_cursor = encode_cursor({"created_at": docs[-1].get("created_at"), "id": docs[-1].id})
+
+        body = render_json({"jobs": jobs, "next_cursor": next_cursor})
+        response_cache.set(cache_key, body, [JOBS_TAG], generation)
+        return json_bytes_response(body, "MISS")
 
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -125,11 +178,74 @@ async def get_jobs(limit: int = 50, start_after: Optional[str] = None):
 
 
 
+@router.get("/jobs/search", tags=["Jobs"])
+async def search_jobs(
+        q: Optional[str] = Query(None, description="Words that must all appear in the job title"),
+        skills: Optional[List[str]] = Query(None, description="Jobs using any of these skills"),
+        employment_type: Optional[List[EmploymentType]] = Query(None, alias="employmentType"),
+        experience_level: Optional[List[str]] = Query(None, alias="experienceLevel"),
+        city: Optional[List[str]] = Query(None),
+        country: Optional[List[str]] = Query(None),
+        location: Optional[List[str]] = Query(None, description="e.g. remote"),
+        job_status: Optional[List[Status]] = Query(None, alias="status"),
+        salary_min: Optional[int] = Query(None, alias="salaryMin", description="Jobs paying at least this much"),
+        salary_max: Optional[int] = Query(None, alias="salaryMax", description="Jobs starting at no more than this"),
+        open_only: bool = Query(True, alias="openOnly", description="Hide jobs past their application close date"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
+):
+    """
+    Filters jobs through the in-memory job index, newest first. Within a filter any
+    value may match; all filters must. Facet counts cover every matching job.
+    """
+    try:
+        filters = {
+            facet: values for facet, values in (
+                ("skills", skills),
+                ("employment_type", employment_type),
+                ("experience_level", experience_level),
+                ("city", city),
+                ("country", country),
+                ("location", location),
+                ("status", job_status),
+            ) if values
+        }
+
+        index = await get_job_index()
+        job_ids, facets = index.search(filters, q, salary_min, salary_max, open_only)
+
+        offset = cursor_offset(decode_cursor(cursor))
+        next_offset = offset + limit
+        return Response(
+            content=render_json({
+                "jobs": [index.job(job_id) for job_id in job_ids[offset:next_offset]],
+                "facets": facets,
+                "total": len(job_ids),
+                "next_cursor": encode_cursor({"offset": next_offset}) if next_offset < len(job_ids) else None
+            }),
+            media_type="application/json"
+        )
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to search jobs: {str(e)}"
+        )
+
+
 @router.get("/jobs/{job_id}", tags=["Jobs"])
 async def get_job_by_id(job_id: str):
+    cache_key = ("job", job_id)
+    body = response_cache.get(cache_key)
+    if body is not None:
+        return json_bytes_response(body, "HIT")
+    generation = response_cache.generation()
+
     try:
         doc_ref = db.collection("jobs").document(job_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
 
         if not doc.exists:
             raise HTTPException(
@@ -138,18 +254,11 @@ async def get_job_by_id(job_id: str):
             )
 
         job_data = doc.to_dict()
-
-        # Convert any datetime fields to ISO format
-        for key, value in job_data.items():
-            if isinstance(value, datetime):
-                job_data[key] = value.isoformat()
-
         job_data["job_id"] = doc.id  # Ensure job_id is included
 
-        return JSONResponse(
-            content=job_data,
-            status_code=status.HTTP_200_OK
-        )
+        body = render_json(job_data)
+        response_cache.set(cache_key, body, [job_tag(job_id)], generation)
+        return json_bytes_response(body, "MISS")
 
     except Exception as e:
         raise HTTPException(
@@ -160,24 +269,25 @@ async def get_job_by_id(job_id: str):
 
 @router.get("/employer/jobs", tags=["Jobs"])
 async def get_jobs_by_employer(employer_id: str):
+    cache_key = ("employer-jobs", employer_id)
+    body = response_cache.get(cache_key)
+    if body is not None:
+        return json_bytes_response(body, "HIT")
+    generation = response_cache.generation()
+
     try:
         jobs_ref = db.collection("jobs").where("employer_id", "==", employer_id)
         docs = jobs_ref.stream()
 
         jobs = []
-        for doc in docs:
+        async for doc in docs:
             job_data = doc.to_dict()
-            for key, value in job_data.items():
-                if isinstance(value, datetime):
-                    job_data[key] = value.isoformat()
-
             job_data["job_id"] = doc.id
             jobs.append(job_data)
 
-        return JSONResponse(
-            content={"jobs": jobs},
-            status_code=status.HTTP_200_OK
-        )
+        body = render_json({"jobs": jobs})
+        response_cache.set(cache_key, body, [employer_jobs_tag(employer_id)], generation)
+        return json_bytes_response(body, "MISS")
 
     except Exception as e:
         raise HTTPException(
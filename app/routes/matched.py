@@ -1,28 +1,46 @@
-from fastapi import APIRouter, Body, HTTPException, status, Query
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Body, HTTPException, status, Query, Depends
+from fastapi.responses import JSONResponse, StreamingResponse
 from datetime import datetime
+from app.auth import get_current_user, ensure_owner, require_admin
 from app.firebase import db
 from app.models.employer import EmployerProfile
 from app.models.jobs import JobModel
-from app.models.matched import MatchedJob
-from collections import defaultdict, Counter
+from app.models.matched import MatchedJob, MatchedJobStatus
+from app.utils.match_summary_helpers import MATCH_SUMMARY, SummaryChanges, rebuild_match_summaries, \
+    set_match_status, summary_ref, summary_response
+from app.utils.email_index import resolve_user_id
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor, fetch_page, \
+    iter_documents, stream_json_array
+from typing import Optional
 
 
 router = APIRouter()
 
 @router.post("/matched", tags=["Matched Jobs"])
-async def save_matched_job(job_data: MatchedJob = Body(...)):
+async def save_matched_job(job_data: MatchedJob = Body(...), user: dict = Depends(get_current_user)):
     try:
+        # The candidate, the job's employer or an admin may record a match.
+        if await resolve_user_id("candidate", job_data.candidate_email) != user["uid"]:
+            job = await db.collection("jobs").document(job_data.job_id).get(field_paths=["employer_id"])
+            await ensure_owner(user, (job.to_dict() or {}).get("employer_id") if job.exists else None)
+
         doc_ref = db.collection("matched_jobs").document()
         job_dict = job_data.dict()
         job_dict["matched_on"] = datetime.utcnow().isoformat()  # ensure timestamp
 
-        doc_ref.set(job_dict)
+        batch = db.batch()
+        batch.set(doc_ref, job_dict)
+        summary = SummaryChanges()
+        summary.record(job_data.job_id, job_data.job_title, new_status=job_dict.get("status"))
+        summary.write(batch)
+        await batch.commit()
 
         return JSONResponse(
             content={"message": "Matched job saved successfully", "id": doc_ref.id},
             status_code=status.HTTP_201_CREATED
         )
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -31,22 +49,28 @@ async def save_matched_job(job_data: MatchedJob = Body(...)):
 
 
 @router.get("/candidate-matched-jobs", tags=["Matched Jobs"])
-async def get_matched_jobs(candidate_email: str = Query(..., description="Email of the candidate")):
+async def get_matched_jobs(
+        candidate_email: str = Query(..., description="Email of the candidate"),
+        user: dict = Depends(get_current_user)
+):
     """
     Get all matched jobs for a specific candidate.
     """
     try:
+        await ensure_owner(user, await resolve_user_id("candidate", candidate_email))
         matched_ref = db.collection("matched_jobs")
         query = matched_ref.where("candidate_email", "==", candidate_email).stream()
 
         matched_jobs = []
-        for doc in query:
+        async for doc in query:
             job = doc.to_dict()
             job["id"] = doc.id
             matched_jobs.append(job)
 
         return JSONResponse(content=matched_jobs, status_code=200)
 
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -55,29 +79,51 @@ async def get_matched_jobs(candidate_email: str = Query(..., description="Email
 
 
 @router.post("/accept-job")
-async def apply_to_job(candidate_email: str = Body(...), job_id: str = Body(...)):
-    ref = db.collection("matched_jobs").document(job_id)
-    ref.update({"status": "accepted"})
+async def apply_to_job(
+        candidate_email: str = Body(...),
+        job_id: str = Body(...),
+        user: dict = Depends(get_current_user)
+):
+    await ensure_owner(user, await resolve_user_id("candidate", candidate_email))
+    await set_match_status(job_id, MatchedJobStatus.ACCEPTED, candidate_email)
     return {"message": "Application successful"}
 
 
-@router.get("/all-matched-jobs", tags=["Matched Jobs"])
-async def get_all_matched_jobs():
+@router.get("/all-matched-jobs", tags=["Matched Jobs"], dependencies=[Depends(require_admin)])
+async def get_all_matched_jobs(
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+        export: bool = Query(False, description="Stream every matched job as a JSON array instead of a page")
+):
     """
-    Get all matched jobs (admin/debug/general view).
+    Get all matched jobs (admin/debug/general view), one page at a time.
     """
     try:
         matched_ref = db.collection("matched_jobs")
-        query = matched_ref.stream()
+
+        if export:
+            docs = iter_documents(matched_ref)
+            items = ({**doc.to_dict(), "id": doc.id} async for doc in docs)
+            return StreamingResponse(stream_json_array(items), media_type="application/json")
+
+        docs = await fetch_page(matched_ref, limit, decode_cursor(cursor).get("id"))
 
         matched_jobs = []
-        for doc in query:
+        for doc in docs:
             job = doc.to_dict()
             job["id"] = doc.id
             matched_jobs.append(job)
 
-        return JSONResponse(content=matched_jobs, status_code=200)
+        return JSONResponse(
+            content={
+                "matched_jobs": matched_jobs,
+                "next_cursor": encode_cursor({"id": docs[-1].id}) if len(docs) == limit else None
+            },
+            status_code=200
+        )
 
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -86,41 +132,20 @@ async def get_all_matched_jobs():
 
 
 @router.get("/job-matches-summary", tags=["Matched Jobs"])
-async def job_matches_summary():
+async def job_matches_summary(job_id: Optional[str] = Query(None, description="Only this job's summary")):
     """
-    Returns summary of job titles with count of total matched candidates
-    and their statuses.
+    Returns, per job id, the job title with the count of matched candidates and
+    their statuses. Served from the matched_job_summary documents kept up to date
+    on every matched job write.
     """
     try:
-        matched_ref = db.collection("matched_jobs")
-        matched_docs = matched_ref.stream()
-
-        summary = defaultdict(lambda: {
-            "total": 0,
-            "statuses": {
-                "pending": 0,
-                "viewed": 0,
-                "accepted": 0,
-                "Declined": 0,
-                "interviewed": 0,
-                "offered": 0,
-                "rejected": 0,
-                "hired": 0
-            }
-        })
-
-        for doc in matched_docs:
-            data = doc.to_dict()
-            job_title = data.get("job_title")
-            status = data.get("status", "pending")
-
-            if job_title:
-                summary[job_title]["total"] += 1
-                if status in summary[job_title]["statuses"]:
-                    summary[job_title]["statuses"][status] += 1
-                else:
-                    # Catch unexpected status
-                    summary[job_title]["statuses"][status] = 1
+        if job_id:
+            doc = await summary_ref(job_id).get()
+            return JSONResponse(content={job_id: summary_response(doc.to_dict() if doc.exists else None)})
+
+        summary = {}
+        async for doc in db.collection(MATCH_SUMMARY).stream():
+            summary[doc.id] = summary_response(doc.to_dict())
 
         return JSONResponse(content=summary)
 
@@ -129,3 +154,19 @@ async def job_matches_summary():
             status_code=500,
             detail=f"Error generating job matches summary: {str(e)}"
         )
+
+
+@router.post("/job-matches-summary/rebuild", tags=["Matched Jobs"], dependencies=[Depends(require_admin)])
+async def rebuild_job_matches_summary():
+    """
+    Recomputes every job summary from matched_jobs. Only needed after writes that
+    bypassed the API.
+    """
+    try:
+        jobs = await rebuild_match_summaries()
+        return {"message": "Job match summaries rebuilt", "jobs": jobs}
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error rebuilding job matches summary: {str(e)}"
+        )
@@ -1,13 +1,13 @@
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
-from firebase_admin import firestore
 from typing import List
 
 from app.models.shared import UserType
 from app.routes.admin import admin_router
 
+from app.firebase import db
+
 router = APIRouter()
-db = firestore.client()
 
 @admin_router.get("/all-users", tags=["Ca Management"])
 async def get_all_users():
@@ -16,7 +16,7 @@ async def get_all_users():
 
         # Admins
         admins_ref = db.collection("admins")
-        for doc in admins_ref.stream():
+        async for doc in admins_ref.stream():
             data = doc.to_dict()
             data["id"] = doc.id
             data["userType"] = UserType.ADMIN
@@ -24,7 +24,7 @@ async def get_all_users():
 
         # Employers
         employers_ref = db.collection("employer")
-        for doc in employers_ref.stream():
+        async for doc in employers_ref.stream():
             data = doc.to_dict()
             data["id"] = doc.id
             data["userType"] = UserType.EMPLOYER
@@ -32,7 +32,7 @@ async def get_all_users():
 
         # Candidates
         candidates_ref = db.collection("candidates")
-        for doc in candidates_ref.stream():
+        async for doc in candidates_ref.stream():
             data = doc.to_dict()
             data["id"] = doc.id
             data["userType"] = UserType.CANDIDATE
@@ -1,30 +1,15 @@
-import requests
 from firebase_admin import auth
 from app.config import firebase_config
+from app.services.http_client import get_http_client
 
-def verify_current_password(email: str, password: str):
+async def verify_current_password(email: str, password: str):
     url = f"{firebase_config['signInWithPasswordBaseURL']}?key={firebase_config['apiKey']}"
     payload = {
         "email": email,
         "password": password,
         "returnSecureToken": True
     }
-
-    response = requests.post(url, json=payload)
-
-    if response.status_code == 200:
-        return response.json()
-    else:
-        raise ValueError("Invalid current password")
-
-def verify_current_password(email: str, password: str, api_key: str):
-    url = f"{firebase_config['signInWithPasswordBaseURL']}?key={firebase_config['apiKey']}"
-    payload = {
-        "email": email,
-        "password": password,
-        "returnSecureToken": True
-    }
-    response = requests.post(url, json=payload)
+    response = await get_http_client().post(url, json=payload)
     if response.status_code == 200:
         return response.json()
     else:
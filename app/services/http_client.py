@@ -0,0 +1,50 @@
+"""
+Shared outbound HTTP client.
+
+One httpx.AsyncClient serves the whole process (Identity Toolkit, GitHub, SendGrid), so
+connections are kept alive and reused instead of paying a TLS handshake per call, and
+HTTP/2 is negotiated where the server offers it. The client is created on first use
+inside the running event loop and closed by the app lifespan.
+"""
+
+from typing import Optional
+
+import httpx
+
+from app.settings import settings
+
+SENDGRID_MAIL_API = "https://api.sendgrid.com/v3/mail/send"
+
+TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60)
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(http2=True, timeout=TIMEOUT, limits=LIMITS)
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def send_email(to_email: str, subject: str, html_content: str):
+    """Sends one HTML email through SendGrid's v3 mail API. Raises httpx.HTTPStatusError on failure."""
+    response = await get_http_client().post(
+        SENDGRID_MAIL_API,
+        headers={"Authorization": f"Bearer {settings.sendgrid_api_key}"},
+        json={
+            "personalizations": [{"to": [{"email": to_email}]}],
+            "from": {"email": settings.sender_email},
+            "subject": subject,
+            "content": [{"type": "text/html", "value": html_content}],
+        },
+    )
+    response.raise_for_status()
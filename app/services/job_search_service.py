@@ -0,0 +1,231 @@
+"""
+In-memory job search index behind /jobs/search.
+
+Jobs are indexed by facet (canonical skills, employment type, experience level, city,
+country, location and status) and title words, with sorted arrays for salary bounds
+and application close dates. A search intersects the matching posting sets, so it
+never scans all jobs, and counts facets over the matches.
+
+The index is loaded on first search and kept current by index_job() after job writes;
+a periodic background rebuild (JOB_INDEX_MAX_AGE) picks up writes from other instances.
+"""
+
+import asyncio
+import bisect
+import logging
+import re
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from app.firebase import db
+from app.services.skill_service import canonical_skills
+
+logger = logging.getLogger("uvicorn")
+
+FACETS = ("skills", "employment_type", "experience_level", "city", "country", "location", "status")
+FACET_LIMIT = 20
+JOB_INDEX_MAX_AGE = 600
+_LAST_ID = chr(0x10FFFF)  # sorts after every document id
+
+
+def _normalize(value) -> Optional[str]:
+    value = getattr(value, "value", value)
+    return (" ".join(str(value).split()).lower() or None) if value else None
+
+
+def _words(text) -> List[str]:
+    return re.findall(r"[0-9a-z]+", str(text or "").lower())
+
+
+def _timestamp(value) -> Optional[float]:
+    if isinstance(value, datetime):
+        return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day, tzinfo=timezone.utc).timestamp()
+    return None
+
+
+def _facet_values(job: dict) -> Dict[str, List[str]]:
+    values = {"skills": canonical_skills(job.get("skills"))}
+    for facet in FACETS[1:]:
+        value = _normalize(job.get(facet))
+        values[facet] = [value] if value else []
+    return values
+
+
+class JobSearchIndex:
+    def __init__(self):
+        self._jobs: Dict[str, dict] = {}
+        self._values: Dict[str, Dict[str, List[str]]] = {}
+        self._postings = {facet: defaultdict(set) for facet in FACETS}
+        self._words = defaultdict(set)
+        self._by_salary_min = []  # sorted (salary_min, job_id)
+        self._by_salary_max = []  # sorted (salary_max, job_id), missing max counts as unbounded
+        self._closes = []  # sorted (close timestamp, job_id)
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def _salary(self, job: dict) -> Optional[Tuple[float, float]]:
+        low, high = job.get("salary_min"), job.get("salary_max")
+        if not low and not high:
+            return None
+        return float(low or 0), (float(high) if high else float("inf"))
+
+    def add(self, job_id: str, job: dict):
+        self.remove(job_id)
+        self._jobs[job_id] = job
+        values = self._values[job_id] = _facet_values(job)
+        for facet, facet_values in values.items():
+            for value in facet_values:
+                self._postings[facet][value].add(job_id)
+        for word in set(_words(job.get("title"))):
+            self._words[word].add(job_id)
+
+        salary = self._salary(job)
+        if salary:
+            bisect.insort(self._by_salary_min, (salary[0], job_id))
+            bisect.insort(self._by_salary_max, (salary[1], job_id))
+        closes = _timestamp(job.get("application_close_date"))
+        if closes is not None:
+            bisect.insort(self._closes, (closes, job_id))
+
+    def remove(self, job_id: str):
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return
+        for facet, facet_values in self._values.pop(job_id).items():
+            for value in facet_values:
+                postings = self._postings[facet][value]
+                postings.discard(job_id)
+                if not postings:
+                    del self._postings[facet][value]
+        for word in set(_words(job.get("title"))):
+            self._words[word].discard(job_id)
+            if not self._words[word]:
+                del self._words[word]
+
+        salary = self._salary(job)
+        entries = [(self._by_salary_min, salary[0]), (self._by_salary_max, salary[1])] if salary else []
+        closes = _timestamp(job.get("application_close_date"))
+        if closes is not None:
+            entries.append((self._closes, closes))
+        for sorted_entries, value in entries:
+            position = bisect.bisect_left(sorted_entries, (value, job_id))
+            if position < len(sorted_entries) and sorted_entries[position] == (value, job_id):
+                del sorted_entries[position]
+
+    def _closed(self, now: float) -> set:
+        return {job_id for _, job_id in self._closes[:bisect.bisect_left(self._closes, (now, ""))]}
+
+    def search(self, filters: Dict[str, List[str]], query: Optional[str] = None,
+               salary_min: Optional[int] = None, salary_max: Optional[int] = None,
+               open_only: bool = True) -> Tuple[List[str], Dict[str, Dict[str, int]]]:
+        """
+        Returns (job ids newest first, facet counts over those jobs). `filters` maps a
+        facet to accepted values: any value of a facet may match, every facet must.
+        """
+        constraints = []
+        for facet, values in filters.items():
+            if facet == "skills":
+                values = canonical_skills(values)
+            else:
+                values = [_normalize(value) for value in values]
+            constraints.append(set().union(*(self._postings[facet].get(value, set()) for value in values)))
+
+        for word in _words(query):
+            constraints.append(self._words.get(word, set()))
+
+        if salary_min is not None:
+            # Pays at least salary_min: the job's maximum reaches it.
+            start = bisect.bisect_left(self._by_salary_max, (salary_min, ""))
+            constraints.append({job_id for _, job_id in self._by_salary_max[start:]})
+        if salary_max is not None:
+            # Starts at no more than salary_max.
+            end = bisect.bisect_right(self._by_salary_min, (salary_max, _LAST_ID))
+            constraints.append({job_id for _, job_id in self._by_salary_min[:end]})
+
+        if constraints:
+            constraints.sort(key=len)
+            matches = constraints[0].intersection(*constraints[1:])
+        else:
+            matches = set(self._jobs)
+
+        if open_only:
+            today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+            matches -= self._closed(today.timestamp())
+
+        ordered = sorted(matches, key=lambda job_id: (str(self._jobs[job_id].get("created_at") or ""), job_id),
+                         reverse=True)
+
+        facets = {}
+        for facet in FACETS:
+            counts = Counter(value for job_id in matches for value in self._values[job_id][facet])
+            facets[facet] = dict(counts.most_common(FACET_LIMIT))
+        return ordered, facets
+
+    def job(self, job_id: str) -> dict:
+        return {**self._jobs[job_id], "job_id": job_id}
+
+
+_index: Optional[JobSearchIndex] = None
+_built_at = 0.0
+_lock: Optional[asyncio.Lock] = None  # created on first use, inside the running event loop
+_pending: Optional[list] = None  # writes seen while a rebuild is reading the collection
+_rebuild_task: Optional[asyncio.Task] = None
+
+
+async def _build() -> JobSearchIndex:
+    global _index, _built_at, _pending
+    _pending = []
+    try:
+        index = JobSearchIndex()
+        async for doc in db.collection("jobs").stream():
+            index.add(doc.id, doc.to_dict() or {})
+        for job_id, job in _pending:
+            if job is None:
+                index.remove(job_id)
+            else:
+                index.add(job_id, job)
+    finally:
+        _pending = None
+
+    _index, _built_at = index, time.monotonic()
+    logger.info(f"Job search index built with {len(index)} jobs")
+    return index
+
+
+async def _rebuild():
+    global _rebuild_task
+    try:
+        async with _lock:
+            await _build()
+    except Exception as e:
+        logger.error(f"Rebuilding job search index failed: {e}")
+    finally:
+        _rebuild_task = None
+
+
+async def get_job_index() -> JobSearchIndex:
+    global _lock, _rebuild_task
+    if _lock is None:
+        _lock = asyncio.Lock()
+    if _index is None:
+        async with _lock:
+            return _index or await _build()
+    if time.monotonic() - _built_at > JOB_INDEX_MAX_AGE and _rebuild_task is None:
+        _rebuild_task = asyncio.create_task(_rebuild())
+    return _index
+
+
+def index_job(job_id: str, job: Optional[dict]):
+    """Records a job write (the full job after the write; None when deleted) in the index."""
+    if _pending is not None:
+        _pending.append((job_id, job))
+    if _index is not None:
+        if job is None:
+            _index.remove(job_id)
+        else:
+            _index.add(job_id, job)
@@ -0,0 +1,629 @@
+"""
+Skill-based candidate/job matching.
+
+Candidates are kept in an inverted index (skill -> candidate ids). Scoring a job only
+touches the postings of the job's own skills, so the cost grows with the number of
+candidates that share a skill with the job, not with the total number of candidates.
+
+Before scoring, PreferenceIndex narrows the candidates to those whose salary
+expectations and work location fit the job.
+
+The process also keeps live indexes of all candidates and open jobs. Profile and job
+writes call rematch_candidate / rematch_job (as background tasks), which re-score only
+the pairs involving the changed document and upsert or remove the matching
+matched_jobs documents. The indexes only see this process's writes, so a match is only
+created or removed after re-reading the other side of the pair.
+"""
+
+import asyncio
+import bisect
+import heapq
+import logging
+import math
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from app.firebase import db
+from app.models.employer import EmployerProfile
+from app.models.jobs import JobModel, Status
+from app.models.matched import MatchedJob, MatchedJobStatus
+from app.services.skill_service import skill_bits, bit_ids, skill_ids_of
+from app.utils.match_summary_helpers import MATCHED_JOBS, SummaryChanges
+
+logger = logging.getLogger("uvicorn")
+
+DEFAULT_TOP_K = 50
+DEFAULT_MIN_SCORE = 0.0
+
+
+def candidate_email(candidate: dict) -> Optional[str]:
+    return candidate.get("email") or (candidate.get("basicInfo") or {}).get("email")
+
+
+class SkillIndex:
+    """
+    Inverted index from skill id to the ids of candidates that have the skill.
+    Each candidate's skills are also kept as a bitset for pairwise scoring.
+    """
+
+    def __init__(self):
+        self._postings = defaultdict(set)
+        self._bits = {}
+
+    def __len__(self):
+        return len(self._bits)
+
+    def __contains__(self, candidate_id):
+        return candidate_id in self._bits
+
+    def add(self, candidate_id: str, skill_ids: Iterable[int]):
+        self.remove(candidate_id)
+        skill_ids = set(skill_ids)
+        self._bits[candidate_id] = skill_bits(skill_ids)
+        for skill_id in skill_ids:
+            self._postings[skill_id].add(candidate_id)
+
+    def remove(self, candidate_id: str):
+        for skill_id in bit_ids(self._bits.pop(candidate_id, 0)):
+            postings = self._postings[skill_id]
+            postings.discard(candidate_id)
+            if not postings:
+                del self._postings[skill_id]
+
+    def skill_weight(self, skill_id: int) -> float:
+        # Rare skills say more about a match than ones almost everybody lists.
+        return math.log(1 + (len(self._bits) + 1) / (len(self._postings.get(skill_id, ())) + 1))
+
+    def weights(self, skill_ids: Iterable[int]) -> Dict[int, float]:
+        return {skill_id: self.skill_weight(skill_id) for skill_id in set(skill_ids)}
+
+    def score(self, job_skill_ids: Iterable[int], top_k: Optional[int] = DEFAULT_TOP_K,
+              min_score: float = DEFAULT_MIN_SCORE,
+              candidate_ids: Optional[set] = None) -> List[Tuple[float, str]]:
+        """
+        Returns up to `top_k` (score, candidate_id) pairs, best first; top_k=None returns
+        every candidate above `min_score`. The score is the weighted share of the job's
+        skills the candidate has, between 0 and 1. `candidate_ids` optionally restricts
+        scoring to a pre-filtered set.
+        """
+        weights = self.weights(job_skill_ids)
+        total = sum(weights.values())
+        if not total:
+            return []
+
+        scores = defaultdict(float)
+        for skill_id, weight in weights.items():
+            postings = self._postings.get(skill_id, set())
+            if candidate_ids is not None:
+                postings = postings & candidate_ids
+            for candidate_id in postings:
+                scores[candidate_id] += weight
+
+        ranked = (
+            (score / total, candidate_id)
+            for candidate_id, score in scores.items()
+            if score / total > min_score
+        )
+        return heapq.nlargest(top_k, ranked) if top_k is not None else sorted(ranked, reverse=True)
+
+    def overlap_score(self, job_skill_ids: Iterable[int], candidate_bits: int) -> float:
+        """The score() of a single job/candidate pair."""
+        weights = self.weights(job_skill_ids)
+        total = sum(weights.values())
+        if not total:
+            return 0.0
+        return sum(weight for skill_id, weight in weights.items() if candidate_bits >> skill_id & 1) / total
+
+    def candidate_bits(self, candidate_id: str) -> int:
+        return self._bits.get(candidate_id, 0)
+
+    def sharing_any(self, bits: int) -> set:
+        """Ids that have at least one of the skills in the bitset."""
+        ids = set()
+        for skill_id in bit_ids(bits):
+            ids |= self._postings.get(skill_id, set())
+        return ids
+
+
+# Candidates whose preferences cannot overlap a job's are filtered out before scoring.
+
+REMOTE = "remote"
+ONSITE = "onsite"
+_LAST_ID = chr(0x10FFFF)  # sorts after every document id
+
+
+class CandidatePreferences(NamedTuple):
+    salary: Optional[Tuple[float, float]]  # expected (min, max); None if not given
+    modes: frozenset  # REMOTE and/or ONSITE
+    city: Optional[str]
+    country: Optional[str]
+    relocate: bool
+
+
+class JobRequirements(NamedTuple):
+    salary: Optional[Tuple[float, float]]  # offered (min, max); None if not given
+    remote: bool
+    city: Optional[str]
+    country: Optional[str]
+
+
+def _place(value) -> Optional[str]:
+    return (" ".join(str(value).split()).lower() or None) if value else None
+
+
+def _work_modes(work_location: str) -> frozenset:
+    work_location = (work_location or "").lower()
+    modes = set()
+    if "remote" in work_location or "hybrid" in work_location:
+        modes.add(REMOTE)
+    if any(word in work_location for word in ("site", "office", "person", "hybrid")):
+        modes.add(ONSITE)
+    # Anything we cannot classify ("any", "flexible", a city name) counts as both.
+    return frozenset(modes) or frozenset((REMOTE, ONSITE))
+
+
+def _salary_range(low, high) -> Optional[Tuple[float, float]]:
+    low, high = low or 0, high or 0
+    if not low and not high:
+        return None
+    return float(low), (float(high) if high >= low else float("inf"))
+
+
+def candidate_preferences(candidate: dict) -> CandidatePreferences:
+    """Combines all of a candidate's job preferences into one set of constraints."""
+    preferences = candidate.get("jobPreference") or []
+    basic_info = candidate.get("basicInfo") or {}
+
+    ranges = [_salary_range(p.get("minSalary"), p.get("maxSalary")) for p in preferences]
+    ranges = [r for r in ranges if r]
+    modes = frozenset().union(*(_work_modes(p.get("workLocation")) for p in preferences)) if preferences \
+        else frozenset((REMOTE, ONSITE))
+
+    return CandidatePreferences(
+        salary=(min(r[0] for r in ranges), max(r[1] for r in ranges)) if ranges else None,
+        modes=modes,
+        city=_place(basic_info.get("city")),
+        country=_place(basic_info.get("country")),
+        relocate=any(str(p.get("relocate", "")).strip().lower() in ("yes", "y", "true", "open", "maybe")
+                     for p in preferences)
+    )
+
+
+def job_requirements(job: JobModel) -> JobRequirements:
+    return JobRequirements(
+        salary=_salary_range(job.salary_min, job.salary_max),
+        remote=(job.location or "").strip().lower() == REMOTE,
+        city=_place(job.city),
+        country=_place(job.country)
+    )
+
+
+def preferences_match(preferences: CandidatePreferences, requirements: JobRequirements) -> bool:
+    """The single-pair version of PreferenceIndex.eligible()."""
+    if preferences.salary and requirements.salary:
+        if preferences.salary[0] > requirements.salary[1] or preferences.salary[1] < requirements.salary[0]:
+            return False
+    if requirements.remote:
+        return REMOTE in preferences.modes
+    if ONSITE not in preferences.modes:
+        return False
+    if preferences.relocate or not (preferences.city or preferences.country):
+        return True
+    if requirements.city and preferences.city:
+        return requirements.city == preferences.city
+    if requirements.country and preferences.country:
+        return requirements.country == preferences.country
+    return True
+
+
+class PreferenceIndex:
+    """
+    Salary interval index (candidates sorted by expected minimum and by expected
+    maximum) plus work mode and location buckets. eligible() returns the candidates
+    whose preferences overlap a job's, without looking at every candidate.
+    """
+
+    def __init__(self):
+        self._preferences = {}
+        self._by_min = []  # sorted (salary_min, candidate_id)
+        self._by_max = []  # sorted (salary_max, candidate_id)
+        self._open_salary = set()
+        self._modes = {REMOTE: set(), ONSITE: set()}
+        self._anywhere = set()  # willing to relocate, or location unknown
+        self._by_city = defaultdict(set)
+        self._by_country = defaultdict(set)
+        self._country_only = set()
+        self._city_only = set()
+
+    def __len__(self):
+        return len(self._preferences)
+
+    def get(self, candidate_id: str) -> Optional[CandidatePreferences]:
+        return self._preferences.get(candidate_id)
+
+    def add(self, candidate_id: str, preferences: CandidatePreferences):
+        self.remove(candidate_id)
+        self._preferences[candidate_id] = preferences
+
+        if preferences.salary:
+            bisect.insort(self._by_min, (preferences.salary[0], candidate_id))
+            bisect.insort(self._by_max, (preferences.salary[1], candidate_id))
+        else:
+            self._open_salary.add(candidate_id)
+
+        for mode in preferences.modes:
+            self._modes[mode].add(candidate_id)
+
+        if preferences.relocate or not (preferences.city or preferences.country):
+            self._anywhere.add(candidate_id)
+        else:
+            if preferences.city:
+                self._by_city[preferences.city].add(candidate_id)
+                if not preferences.country:
+                    self._city_only.add(candidate_id)
+            if preferences.country:
+                self._by_country[preferences.country].add(candidate_id)
+                if not preferences.city:
+                    self._country_only.add(candidate_id)
+
+    def remove(self, candidate_id: str):
+        preferences = self._preferences.pop(candidate_id, None)
+        if not preferences:
+            return
+
+        if preferences.salary:
+            for entries, value in ((self._by_min, preferences.salary[0]), (self._by_max, preferences.salary[1])):
+                position = bisect.bisect_left(entries, (value, candidate_id))
+                if position < len(entries) and entries[position] == (value, candidate_id):
+                    del entries[position]
+        self._open_salary.discard(candidate_id)
+
+        for bucket in self._modes.values():
+            bucket.discard(candidate_id)
+        self._anywhere.discard(candidate_id)
+        self._country_only.discard(candidate_id)
+        self._city_only.discard(candidate_id)
+        if preferences.city:
+            self._by_city[preferences.city].discard(candidate_id)
+        if preferences.country:
+            self._by_country[preferences.country].discard(candidate_id)
+
+    def _salary_overlapping(self, low: float, high: float) -> set:
+        # Candidates expecting at most `high`: a prefix of _by_min. Candidates expecting
+        # at least `low`: a suffix of _by_max. Walk the shorter one, check the other bound.
+        below_high = bisect.bisect_right(self._by_min, (high, _LAST_ID))
+        above_low = bisect.bisect_left(self._by_max, (low, ""))
+        if below_high <= len(self._by_max) - above_low:
+            ids = {cid for _, cid in self._by_min[:below_high] if self._preferences[cid].salary[1] >= low}
+        else:
+            ids = {cid for _, cid in self._by_max[above_low:] if self._preferences[cid].salary[0] <= high}
+        return ids | self._open_salary
+
+    def _near(self, requirements: JobRequirements) -> set:
+        ids = set(self._anywhere)
+        if requirements.city:
+            ids |= self._by_city.get(requirements.city, set())
+            if requirements.country:
+                ids |= self._country_only & self._by_country.get(requirements.country, set())
+            else:
+                ids |= self._country_only
+        elif requirements.country:
+            ids |= self._by_country.get(requirements.country, set()) | self._city_only
+        return ids
+
+    def eligible(self, requirements: JobRequirements) -> set:
+        """Ids of the candidates whose preferences fit the job's."""
+        constraints = []
+        if requirements.salary:
+            constraints.append(self._salary_overlapping(*requirements.salary))
+        if requirements.remote:
+            constraints.append(self._modes[REMOTE])
+        else:
+            constraints.append(self._modes[ONSITE])
+            if requirements.city or requirements.country:
+                constraints.append(self._near(requirements))
+
+        constraints.sort(key=len)
+        return constraints[0].intersection(*constraints[1:])
+
+
+def build_matched_job(job: JobModel, job_id: str, company_name: Optional[str], email: str,
+                      score: Optional[float] = None) -> MatchedJob:
+    return MatchedJob(
+        candidate_email=email,
+        job_id=job_id,
+        job_title=job.title,
+        company_name=company_name or "Unknown Company",
+        description=job.description,
+        tags=[
+            job.employment_type.value if job.employment_type else "",
+            job.experience_level or "",
+            "Remote" if job.location == "remote" else "On-site"
+        ],
+        salary=f"R{job.salary_min} - R{job.salary_max}" if job.salary_min and job.salary_max else None,
+        matched_on=datetime.utcnow(),
+        status=MatchedJobStatus.PENDING,
+        score=score
+    )
+
+
+def match_job(job: JobModel, job_id: str, job_skill_ids: Iterable[int], employer: EmployerProfile,
+              candidates: Dict[str, dict], index: SkillIndex, top_k: int = DEFAULT_TOP_K,
+              min_score: float = DEFAULT_MIN_SCORE, candidate_ids: Optional[set] = None) -> List[MatchedJob]:
+    """
+    Scores `job` against the candidates in `index` and builds the top-k MatchedJobs.
+    `candidates` maps candidate id to the candidate document; `candidate_ids`
+    optionally limits scoring to a prefiltered set.
+    """
+    matched = []
+    for score, candidate_id in index.score(job_skill_ids, top_k, min_score, candidate_ids):
+        email = candidate_email(candidates.get(candidate_id, {}))
+        if email:
+            matched.append(build_matched_job(job, job_id, employer.companyName, email, round(score, 4)))
+    return matched
+
+
+# --- Incremental re-matching -------------------------------------------------
+
+MATCHED_BY = "matcher"
+OPEN_JOB_STATUSES = (None, Status.active.value)
+BATCH_LIMIT = 500
+CANDIDATE_FIELDS = ["skills", "skillIds", "email", "basicInfo.email", "basicInfo.city", "basicInfo.country",
+                    "jobPreference"]
+
+_candidate_index = SkillIndex()
+_candidate_emails: Dict[str, str] = {}
+_candidate_preferences = PreferenceIndex()
+_job_index = SkillIndex()
+_jobs: Dict[str, "IndexedJob"] = {}
+_loaded = False
+_load_lock: Optional[asyncio.Lock] = None  # created on first use, inside the running event loop
+
+
+class IndexedJob(NamedTuple):
+    job: JobModel
+    company_name: Optional[str]
+    skill_ids: List[int]
+    requirements: JobRequirements
+
+
+def matched_job_id(job_id: str, candidate_id: str) -> str:
+    """Matcher-created matched_jobs documents have one stable id per pair."""
+    return f"{job_id}__{candidate_id}"
+
+
+def _index_candidate(candidate_id: str, data: dict, skill_ids: List[int]):
+    email = candidate_email(data)
+    if email:
+        _candidate_emails[candidate_id] = email
+        _candidate_index.add(candidate_id, skill_ids)
+        _candidate_preferences.add(candidate_id, candidate_preferences(data))
+    else:
+        _candidate_emails.pop(candidate_id, None)
+        _candidate_index.remove(candidate_id)
+        _candidate_preferences.remove(candidate_id)
+
+
+def _index_job(job_id: str, data: Optional[dict], company_name: Optional[str], skill_ids: List[int]):
+    if not data or data.get("status") not in OPEN_JOB_STATUSES:
+        _jobs.pop(job_id, None)
+        _job_index.remove(job_id)
+        return
+    try:
+        job = JobModel.parse_obj(data)
+    except ValueError as e:
+        logger.warning(f"Skipping job {job_id} for matching: {e}")
+        _jobs.pop(job_id, None)
+        _job_index.remove(job_id)
+        return
+    _jobs[job_id] = IndexedJob(job, company_name, skill_ids, job_requirements(job))
+    _job_index.add(job_id, skill_ids)
+
+
+async def _company_names(employer_ids: Iterable[str]) -> Dict[str, Optional[str]]:
+    refs = [db.collection("employer").document(employer_id) for employer_id in set(employer_ids) if employer_id]
+    names = {}
+    if refs:
+        async for doc in db.get_all(refs, field_paths=["companyName"]):
+            names[doc.id] = (doc.to_dict() or {}).get("companyName") if doc.exists else None
+    return names
+
+
+async def ensure_loaded():
+    """Builds the candidate and job indexes on first use."""
+    global _loaded, _load_lock
+    if _loaded:
+        return
+    if _load_lock is None:
+        _load_lock = asyncio.Lock()
+    async with _load_lock:
+        if _loaded:
+            return
+        async for doc in db.collection("candidate").select(CANDIDATE_FIELDS).stream():
+            data = doc.to_dict() or {}
+            _index_candidate(doc.id, data, skill_ids_of(data, "skillIds"))
+
+        jobs = {doc.id: doc.to_dict() or {} async for doc in db.collection("jobs").stream()}
+        names = await _company_names(job.get("employer_id") for job in jobs.values())
+        for job_id, data in jobs.items():
+            _index_job(job_id, data, names.get(data.get("employer_id")), skill_ids_of(data, "skill_ids"))
+
+        _loaded = True
+        logger.info(f"Matching indexes loaded: {len(_candidate_index)} candidates, {len(_jobs)} jobs")
+
+
+async def _refresh_jobs(job_ids: Iterable[str]):
+    """Re-reads jobs into the index, picking up writes made by other processes."""
+    refs = [db.collection("jobs").document(job_id) for job_id in set(job_ids)]
+    if not refs:
+        return
+    jobs = {doc.id: (doc.to_dict() if doc.exists else None) async for doc in db.get_all(refs)}
+    names = await _company_names(job.get("employer_id") for job in jobs.values() if job)
+    for job_id, data in jobs.items():
+        _index_job(job_id, data, names.get((data or {}).get("employer_id")),
+                   skill_ids_of(data, "skill_ids") if data else [])
+
+
+async def _refresh_candidates(candidate_ids: Iterable[str]):
+    """Re-reads candidates into the index, picking up writes made by other processes."""
+    refs = [db.collection("candidate").document(candidate_id) for candidate_id in set(candidate_ids)]
+    if not refs:
+        return
+    async for doc in db.get_all(refs, field_paths=CANDIDATE_FIELDS):
+        data = (doc.to_dict() or {}) if doc.exists else {}
+        _index_candidate(doc.id, data, skill_ids_of(data, "skillIds"))
+
+
+async def _apply_matches(existing_query, wanted: Dict[str, MatchedJob], recheck=None) -> set:
+    """
+    Makes the matcher-created, still pending documents of `existing_query` equal to
+    `wanted` (matched_jobs id -> MatchedJob). Documents a candidate has acted on, or
+    that were not created by the matcher, are never touched. Job summaries are
+    updated in the same batches. Returns the ids of the documents left in place.
+
+    The indexes only see this process's own writes, so before creating or deleting a
+    match `recheck(match_ids)` re-reads the other side of those pairs and returns the
+    matches among them that should exist.
+    """
+    writes = []
+    stale = {}
+    kept = set()
+    async for doc in existing_query.select(["job_id", "job_title", "status", "matched_by", "score"]).stream():
+        data = doc.to_dict() or {}
+        kept.add(doc.id)
+        if doc.id in wanted:
+            match = wanted.pop(doc.id)
+            if data.get("status") == MatchedJobStatus.PENDING and data.get("score") != match.score:
+                writes.append(("update", doc.reference, {"score": match.score}))
+        elif data.get("matched_by") == MATCHED_BY and data.get("status") == MatchedJobStatus.PENDING:
+            stale[doc.id] = (doc.reference, data)
+
+    if recheck and (stale or wanted):
+        confirmed = await recheck(set(stale) | set(wanted))
+        wanted = {match_id: match for match_id, match in confirmed.items() if match_id not in stale}
+    else:
+        confirmed = {}
+    for doc_id, (ref, data) in stale.items():
+        if doc_id not in confirmed:
+            writes.append(("delete", ref, data))
+            kept.discard(doc_id)
+        elif data.get("score") != confirmed[doc_id].score:
+            writes.append(("update", ref, {"score": confirmed[doc_id].score}))
+
+    for match_id, match in wanted.items():
+        match_dict = match.dict()
+        match_dict["matched_on"] = match.matched_on.isoformat()
+        match_dict["matched_by"] = MATCHED_BY
+        writes.append(("set", db.collection(MATCHED_JOBS).document(match_id), match_dict))
+
+    # Each write may add a summary write, so a batch holds at most half the limit.
+    chunk = BATCH_LIMIT // 2
+    for start in range(0, len(writes), chunk):
+        batch = db.batch()
+        summary = SummaryChanges()
+        for op, ref, data in writes[start:start + chunk]:
+            if op == "delete":
+                batch.delete(ref)
+                summary.record(data.get("job_id"), data.get("job_title"), old_status=data.get("status"))
+            elif op == "update":
+                batch.update(ref, data)
+            else:
+                batch.set(ref, data)
+                summary.record(data["job_id"], data["job_title"], new_status=data["status"])
+        summary.write(batch)
+        await batch.commit()
+    return kept
+
+
+# Both re-match paths keep exactly the pairs whose preferences match and whose score is
+# above min_score. There is deliberately no top-k: a candidate's best jobs and a job's
+# best candidates are different sets, so ranking on either side would make matched_jobs
+# depend on which of the two was written last.
+
+def _candidate_matches(candidate_id: str, email: str, job_ids: Iterable[str],
+                       min_score: float) -> Dict[str, MatchedJob]:
+    bits = _candidate_index.candidate_bits(candidate_id)
+    preferences = _candidate_preferences.get(candidate_id)
+    matches = {}
+    if preferences is None:
+        return matches
+    for job_id in job_ids:
+        indexed = _jobs.get(job_id)
+        if indexed is None or not preferences_match(preferences, indexed.requirements):
+            continue
+        score = _candidate_index.overlap_score(indexed.skill_ids, bits)
+        if score > min_score:
+            matches[matched_job_id(job_id, candidate_id)] = build_matched_job(
+                indexed.job, job_id, indexed.company_name, email, round(score, 4)
+            )
+    return matches
+
+
+def _job_matches(job_id: str, min_score: float, candidate_ids: Optional[set] = None) -> Dict[str, MatchedJob]:
+    if job_id not in _jobs:
+        return {}
+    job, company_name, job_skill_ids, requirements = _jobs[job_id]
+    eligible = _candidate_preferences.eligible(requirements)
+    if candidate_ids is not None:
+        eligible = eligible & candidate_ids
+    return {
+        matched_job_id(job_id, candidate_id): build_matched_job(
+            job, job_id, company_name, _candidate_emails[candidate_id], round(score, 4)
+        )
+        for score, candidate_id in _candidate_index.score(job_skill_ids, None, min_score, eligible)
+    }
+
+
+async def rematch_candidate(candidate_id: str, min_score: float = DEFAULT_MIN_SCORE):
+    """
+    Re-scores one candidate against the open jobs that share a skill with them.
+    """
+    try:
+        await ensure_loaded()
+        doc = await db.collection("candidate").document(candidate_id).get(field_paths=CANDIDATE_FIELDS)
+        data = (doc.to_dict() or {}) if doc.exists else {}
+        previous_email = _candidate_emails.get(candidate_id)
+        _index_candidate(candidate_id, data, skill_ids_of(data, "skillIds"))
+        email = _candidate_emails.get(candidate_id) or previous_email
+        if not email:
+            return
+
+        async def recheck(match_ids: set) -> Dict[str, MatchedJob]:
+            suffix = matched_job_id("", candidate_id)
+            job_ids = {match_id[:-len(suffix)] for match_id in match_ids if match_id.endswith(suffix)}
+            await _refresh_jobs(job_ids)
+            return _candidate_matches(candidate_id, email, job_ids, min_score)
+
+        job_ids = _job_index.sharing_any(_candidate_index.candidate_bits(candidate_id))
+        wanted = _candidate_matches(candidate_id, email, job_ids, min_score)
+        if previous_email and previous_email != email:
+            # Pending matches were stored under the old address: drop them (and their
+            # summary counts) first. Ones the candidate acted on stay and are not redone.
+            kept = await _apply_matches(db.collection(MATCHED_JOBS).where("candidate_email", "==", previous_email), {})
+            for match_id in kept:
+                wanted.pop(match_id, None)
+        await _apply_matches(db.collection(MATCHED_JOBS).where("candidate_email", "==", email), wanted, recheck)
+    except Exception as e:
+        logger.error(f"Re-matching candidate {candidate_id} failed: {e}")
+
+
+async def rematch_job(job_id: str, min_score: float = DEFAULT_MIN_SCORE):
+    """
+    Re-scores one job against the candidates that share a skill with it. Closed or
+    deleted jobs lose their pending matches.
+    """
+    try:
+        await ensure_loaded()
+        await _refresh_jobs([job_id])
+
+        async def recheck(match_ids: set) -> Dict[str, MatchedJob]:
+            prefix = matched_job_id(job_id, "")
+            candidate_ids = {match_id[len(prefix):] for match_id in match_ids if match_id.startswith(prefix)}
+            await _refresh_candidates(candidate_ids)
+            return _job_matches(job_id, min_score, candidate_ids)
+
+        wanted = _job_matches(job_id, min_score)
+        await _apply_matches(db.collection(MATCHED_JOBS).where("job_id", "==", job_id), wanted, recheck)
+    except Exception as e:
+        logger.error(f"Re-matching job {job_id} failed: {e}")
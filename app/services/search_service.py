@@ -0,0 +1,223 @@
+"""
+In-memory trigram index for admin user search.
+
+Each user collection gets a TrigramIndex over its searchable fields (SEARCH_FIELDS),
+built on first search and kept current by calling index_user() after writes. A search
+matches the query as a substring of a field, like the scan it replaces, but only checks
+the documents holding all of the query's trigrams (or, for one and two character
+queries, the query itself), so its cost does not grow with the size of the collection;
+only the page being returned is read from Firestore.
+
+Writes made by other processes are picked up by a periodic background rebuild
+(SEARCH_INDEX_MAX_AGE), during which the previous index keeps serving.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.firebase import db
+
+logger = logging.getLogger("uvicorn")
+
+SEARCH_FIELDS = {
+    "candidate": ["basicInfo.firstName", "basicInfo.lastName", "basicInfo.email"],
+    "employer": ["companyName", "email"],
+    "admin": ["firstName", "lastName", "email"],
+}
+DEFAULT_SEARCH_FIELDS = ["companyName", "email"]
+
+SEARCH_INDEX_MAX_AGE = 600
+
+
+def _normalize(value) -> str:
+    return " ".join(str(value or "").split()).lower()
+
+
+def _field_grams(text: str) -> set:
+    # Every substring of up to three characters, so shorter queries have a posting too.
+    return {text[i:i + size] for size in (1, 2, 3) for i in range(len(text) - size + 1)}
+
+
+def _query_grams(query: str) -> set:
+    if len(query) >= 3:
+        return {query[i:i + 3] for i in range(len(query) - 2)}
+    return {query}
+
+
+def _word_prefix(query: str, text: str) -> bool:
+    return text.startswith(query) or re.search(r"[^0-9a-z]" + re.escape(query), text) is not None
+
+
+def _changed(changes: dict, path: str) -> Tuple[bool, object]:
+    """Whether a write of `changes` set the field at `path`, and to what."""
+    if path in changes:
+        return True, changes[path]
+    parts = path.split(".")
+    for i in range(len(parts) - 1, 0, -1):
+        head = ".".join(parts[:i])
+        if head in changes:
+            value = changes[head]
+            for part in parts[i:]:
+                value = value.get(part) if isinstance(value, dict) else None
+            return True, value
+    return False, None
+
+
+class TrigramIndex:
+    def __init__(self, fields: List[str]):
+        self.fields = fields
+        self._postings = defaultdict(set)
+        self._texts: Dict[str, Tuple[str, ...]] = {}
+        self._status: Dict[str, Optional[str]] = {}
+
+    def __len__(self):
+        return len(self._texts)
+
+    def add(self, doc_id: str, texts: Tuple[str, ...], status: Optional[str]):
+        self.remove(doc_id)
+        self._texts[doc_id] = texts
+        self._status[doc_id] = status
+        for gram in set().union(*(_field_grams(text) for text in texts)):
+            self._postings[gram].add(doc_id)
+
+    def remove(self, doc_id: str):
+        texts = self._texts.pop(doc_id, None)
+        self._status.pop(doc_id, None)
+        if texts is None:
+            return
+        for gram in set().union(*(_field_grams(text) for text in texts)):
+            postings = self._postings[gram]
+            postings.discard(doc_id)
+            if not postings:
+                del self._postings[gram]
+
+    def add_document(self, doc_id: str, data: dict):
+        self.apply(doc_id, data, replace=True)
+
+    def apply(self, doc_id: str, changes: dict, replace: bool = False):
+        """Applies a (possibly partial) write of `changes` to the entry for `doc_id`."""
+        texts = list(self._texts.get(doc_id, ("",) * len(self.fields)))
+        status = self._status.get(doc_id)
+        for position, path in enumerate(self.fields):
+            changed, value = _changed(changes, path)
+            if changed or replace:
+                texts[position] = _normalize(value)
+        changed, value = _changed(changes, "status")
+        if changed or replace:
+            status = getattr(value, "value", value)
+        self.add(doc_id, tuple(texts), status)
+
+    def search(self, query: str, status: Optional[str] = None) -> List[str]:
+        """
+        Ids of the documents with a field containing `query`, those where it starts a
+        word first, then in field order.
+        """
+        query = _normalize(query)
+        if not query:
+            return []
+
+        # A field containing the query contains all of its grams: intersect the posting
+        # lists, smallest first, then confirm the substring.
+        postings = sorted((self._postings.get(gram, set()) for gram in _query_grams(query)), key=len)
+        candidates = postings[0].intersection(*postings[1:])
+
+        ranked = []
+        for doc_id in candidates:
+            if status and self._status.get(doc_id) != status:
+                continue
+            texts = self._texts[doc_id]
+            if not any(query in text for text in texts):
+                continue
+            ranked.append((not any(_word_prefix(query, text) for text in texts), texts, doc_id))
+        ranked.sort()
+        return [entry[-1] for entry in ranked]
+
+
+_indexes: Dict[str, TrigramIndex] = {}
+_built_at: Dict[str, float] = {}
+_locks = defaultdict(asyncio.Lock)
+_rebuilds: Dict[str, list] = {}
+_rebuild_tasks: Dict[str, asyncio.Task] = {}
+
+
+def search_fields(collection: str) -> List[str]:
+    return SEARCH_FIELDS.get(collection, DEFAULT_SEARCH_FIELDS)
+
+
+async def _build(collection: str) -> TrigramIndex:
+    _rebuilds[collection] = []
+    try:
+        index = TrigramIndex(search_fields(collection))
+        async for doc in db.collection(collection).select(index.fields + ["status"]).stream():
+            index.add_document(doc.id, doc.to_dict() or {})
+        # Replay writes that happened while the collection was being read.
+        for doc_id, changes in _rebuilds[collection]:
+            index.apply(doc_id, changes)
+    finally:
+        _rebuilds.pop(collection, None)
+
+    _indexes[collection] = index
+    _built_at[collection] = time.monotonic()
+    logger.info(f"Search index for {collection} built with {len(index)} documents")
+    return index
+
+
+async def _rebuild(collection: str):
+    try:
+        async with _locks[collection]:
+            await _build(collection)
+    except Exception as e:
+        logger.error(f"Rebuilding search index for {collection} failed: {e}")
+    finally:
+        _rebuild_tasks.pop(collection, None)
+
+
+async def _get_index(collection: str) -> TrigramIndex:
+    index = _indexes.get(collection)
+    if index is None:
+        async with _locks[collection]:
+            index = _indexes.get(collection) or await _build(collection)
+    elif time.monotonic() - _built_at[collection] > SEARCH_INDEX_MAX_AGE and collection not in _rebuild_tasks:
+        _rebuild_tasks[collection] = asyncio.create_task(_rebuild(collection))
+    return index
+
+
+def index_user(collection: str, doc_id: str, changes: dict):
+    """
+    Records a write to a user document in the search index. `changes` is what was
+    written, in the same shape as the update (nested maps replace the whole map).
+    """
+    if collection in _rebuilds:
+        _rebuilds[collection].append((doc_id, changes))
+    index = _indexes.get(collection)
+    if index is not None:
+        index.apply(doc_id, changes)
+
+
+async def search_users(collection: str, query: str, status: Optional[str] = None) -> List[str]:
+    index = await _get_index(collection)
+    return index.search(query, status)
+
+
+async def fetch_users(collection: str, doc_ids: Iterable[str], status: Optional[str] = None) -> List[dict]:
+    """Reads `doc_ids` in one batch, keeping their order."""
+    doc_ids = list(doc_ids)
+    if not doc_ids:
+        return []
+    refs = [db.collection(collection).document(doc_id) for doc_id in doc_ids]
+    docs = {doc.id: doc async for doc in db.get_all(refs)}
+
+    users = []
+    for doc_id in doc_ids:
+        doc = docs.get(doc_id)
+        if not doc or not doc.exists:
+            continue
+        data = doc.to_dict()
+        if status and data.get("status") != status:
+            continue
+        users.append({"id": doc_id, **data})
+    return users
@@ -0,0 +1,165 @@
+"""
+Canonical skill vocabulary.
+
+Skills are entered as free text ("Python", "python3", "Py"). canonical_skill() maps them
+to one canonical name per skill through SKILL_VOCABULARY's aliases; unknown skills keep
+their normalised spelling. Vocabulary skills have a small integer id (their position in
+SKILL_VOCABULARY, starting at 1), so documents can store `skillIds` next to the raw
+strings and the matcher can compare skills as ints and bitsets instead of strings.
+
+Free-text skills outside the vocabulary are never stored as ids: user input never grows
+the vocabulary. For matching, skill_ids_of() gives them process-local ids numbered after
+the vocabulary, assigned from their canonical spelling, so two documents sharing only a
+free-text skill still match. Add a skill (or an alias) to SKILL_VOCABULARY to store it.
+"""
+
+import re
+import threading
+from typing import Dict, Iterable, List, Optional
+
+# Append only: a skill's id is its position in this list, and ids are stored on documents.
+SKILL_VOCABULARY = [
+    ("python", ["python3", "python 3", "py"]),
+    ("javascript", ["js", "ecmascript", "es6"]),
+    ("typescript", ["ts"]),
+    ("java", []),
+    ("c#", ["csharp", "c sharp"]),
+    ("c++", ["cpp", "cplusplus"]),
+    ("c", []),
+    ("go", ["golang"]),
+    ("rust", []),
+    ("php", []),
+    ("ruby", []),
+    ("kotlin", []),
+    ("swift", []),
+    ("dart", []),
+    ("r", []),
+    ("sql", []),
+    ("html", ["html5"]),
+    ("css", ["css3"]),
+    ("react", ["reactjs", "react.js"]),
+    ("angular", ["angularjs", "angular.js"]),
+    ("vue", ["vuejs", "vue.js"]),
+    ("node.js", ["node", "nodejs", "node js"]),
+    ("express", ["expressjs", "express.js"]),
+    ("next.js", ["nextjs"]),
+    ("django", []),
+    ("flask", []),
+    ("fastapi", ["fast api"]),
+    (".net", ["dotnet", "asp.net", ".net core"]),
+    ("spring", ["spring boot", "springboot"]),
+    ("laravel", []),
+    ("flutter", []),
+    ("react native", ["react-native"]),
+    ("postgresql", ["postgres", "psql"]),
+    ("mysql", []),
+    ("mongodb", ["mongo"]),
+    ("redis", []),
+    ("firebase", ["firestore"]),
+    ("aws", ["amazon web services"]),
+    ("azure", ["microsoft azure"]),
+    ("gcp", ["google cloud", "google cloud platform"]),
+    ("docker", []),
+    ("kubernetes", ["k8s"]),
+    ("terraform", []),
+    ("ci/cd", ["cicd", "ci cd", "continuous integration"]),
+    ("git", ["github", "gitlab"]),
+    ("linux", []),
+    ("rest api", ["rest", "restful", "rest apis", "restful api"]),
+    ("graphql", []),
+    ("machine learning", ["ml"]),
+    ("deep learning", ["dl"]),
+    ("data analysis", ["data analytics"]),
+    ("data science", []),
+    ("excel", ["microsoft excel", "ms excel"]),
+    ("power bi", ["powerbi"]),
+    ("tableau", []),
+    ("figma", []),
+    ("ui/ux", ["ux", "ui", "ux design", "ui design", "ui/ux design"]),
+    ("project management", []),
+    ("agile", ["scrum"]),
+    ("testing", ["qa", "quality assurance", "software testing"]),
+    ("cybersecurity", ["cyber security", "information security", "infosec"]),
+]
+
+_ids: Dict[str, int] = {}
+_names: Dict[int, str] = {}
+_aliases: Dict[str, str] = {}
+_local_ids: Dict[str, int] = {}  # free-text skill -> id, this process only
+_local_names: Dict[int, str] = {}
+_local_lock = threading.Lock()
+
+for _position, (_name, _skill_aliases) in enumerate(SKILL_VOCABULARY, start=1):
+    _ids[_name] = _position
+    _names[_position] = _name
+    for _alias in [_name] + _skill_aliases:
+        _aliases[_alias] = _name
+
+
+def normalize_skill(skill: str) -> str:
+    return re.sub(r"\s+", " ", (skill or "").strip().lower())
+
+
+def canonical_skill(skill: str) -> Optional[str]:
+    normalized = normalize_skill(skill)
+    if not normalized:
+        return None
+    return _aliases.get(normalized, normalized)
+
+
+def canonical_skills(skills: Optional[Iterable[str]]) -> List[str]:
+    """Canonical names of `skills`, de-duplicated, in first-seen order."""
+    return list(dict.fromkeys(filter(None, (canonical_skill(skill) for skill in skills or []))))
+
+
+def skill_name(skill_id: int) -> Optional[str]:
+    return _names.get(skill_id) or _local_names.get(skill_id)
+
+
+def _local_id(name: str) -> int:
+    skill_id = _local_ids.get(name)
+    if skill_id is None:
+        with _local_lock:
+            skill_id = _local_ids.get(name)
+            if skill_id is None:
+                skill_id = len(SKILL_VOCABULARY) + 1 + len(_local_ids)
+                _local_ids[name] = skill_id
+                _local_names[skill_id] = name
+    return skill_id
+
+
+def skill_ids(skills: Optional[Iterable[str]]) -> List[int]:
+    """
+    Sorted ids of the vocabulary skills among `skills`. This is what gets stored as
+    skillIds / skill_ids next to the raw skill strings.
+    """
+    return sorted({_ids[name] for name in canonical_skills(skills) if name in _ids})
+
+
+def skill_ids_of(data: dict, ids_field: str, skills_field: str = "skills") -> List[int]:
+    """
+    Sorted ids to match a document's skills on: its stored vocabulary ids (computed from
+    its raw skills if it has none) plus process-local ids for its free-text skills.
+    Never store the result; local ids differ between processes.
+    """
+    skills = data.get(skills_field)
+    if ids_field in data:
+        ids = {skill_id for skill_id in data[ids_field] or [] if skill_id in _names}
+    else:
+        ids = set(skill_ids(skills))
+    ids.update(_local_id(name) for name in canonical_skills(skills) if name not in _ids)
+    return sorted(ids)
+
+
+def skill_bits(skill_ids: Iterable[int]) -> int:
+    bits = 0
+    for skill_id in skill_ids:
+        bits |= 1 << skill_id
+    return bits
+
+
+def bit_ids(bits: int) -> Iterable[int]:
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
@@ -0,0 +1,226 @@
+"""
+Object storage backends.
+
+Everything that stores or signs files goes through `storage`, picked by the
+STORAGE_BACKEND setting:
+
+- "s3" (default): one pooled boto3 client shared by the whole process.
+- "local": files under LOCAL_STORAGE_ROOT, served and accepted by app/routes/files.py
+  with HMAC-signed URLs. No AWS account needed, which makes it usable for offline
+  benchmarks and development.
+
+All methods block and should be called through run_in_threadpool from async code.
+"""
+
+import hashlib
+import hmac
+import os
+import secrets
+import shutil
+import time
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Optional
+from urllib.parse import quote, urlencode
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from app.settings import settings
+
+
+class ObjectStorage(ABC):
+    @abstractmethod
+    def upload(self, fileobj: BinaryIO, key: str, content_type: Optional[str] = None,
+               cache_control: Optional[str] = None):
+        """Stores the contents of `fileobj` under `key`."""
+
+    @abstractmethod
+    def download(self, key: str) -> Optional[bytes]:
+        """Returns the object's bytes, or None if it does not exist."""
+
+    @abstractmethod
+    def sign(self, key: str, expiration: int) -> str:
+        """Returns a URL that allows reading `key` for `expiration` seconds."""
+
+    @abstractmethod
+    def presign_post(self, key: str, content_type: str, max_bytes: int, expiration: int) -> dict:
+        """Returns {"url", "fields"} for a browser form upload of exactly `key`."""
+
+    @abstractmethod
+    def head(self, key: str) -> Optional[dict]:
+        """Returns {"ContentLength", "ContentType"} for `key`, or None if it does not exist."""
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Removes `key`; missing keys are ignored."""
+
+    @abstractmethod
+    def public_url(self, key: str) -> str:
+        """Returns the unsigned URL of `key`."""
+
+
+class S3Storage(ObjectStorage):
+    def __init__(self):
+        self.bucket = settings.aws_bucket_name
+        self.region = settings.aws_region
+        self.client = boto3.client(
+            "s3",
+            region_name=self.region,
+            aws_access_key_id=settings.aws_access_key,
+            aws_secret_access_key=settings.aws_secret_key,
+            config=Config(
+                signature_version="s3v4",
+                s3={"addressing_style": "virtual"},
+                max_pool_connections=settings.s3_max_pool_connections,
+                connect_timeout=settings.s3_connect_timeout,
+                read_timeout=settings.s3_read_timeout,
+                retries={"max_attempts": 3, "mode": "standard"},
+                tcp_keepalive=True,
+            )
+        )
+        self.transfer_config = TransferConfig(
+            max_concurrency=settings.s3_max_upload_concurrency,
+            use_threads=settings.s3_max_upload_concurrency > 1,
+        )
+
+    def upload(self, fileobj, key, content_type=None, cache_control=None):
+        extra_args = {}
+        if content_type:
+            extra_args["ContentType"] = content_type
+        if cache_control:
+            extra_args["CacheControl"] = cache_control
+        self.client.upload_fileobj(
+            Fileobj=fileobj,
+            Bucket=self.bucket,
+            Key=key,
+            ExtraArgs=extra_args or None,
+            Config=self.transfer_config
+        )
+
+    def download(self, key):
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                return None
+            raise
+        return response["Body"].read()
+
+    def sign(self, key, expiration):
+        return self.client.generate_presigned_url(
+            ClientMethod="get_object",
+            Params={"Bucket": self.bucket, "Key": key},
+            ExpiresIn=expiration
+        )
+
+    def presign_post(self, key, content_type, max_bytes, expiration):
+        post = self.client.generate_presigned_post(
+            Bucket=self.bucket,
+            Key=key,
+            Fields={"Content-Type": content_type},
+            Conditions=[
+                {"Content-Type": content_type},
+                ["content-length-range", 1, max_bytes],
+            ],
+            ExpiresIn=expiration
+        )
+        return {"url": post["url"], "fields": post["fields"]}
+
+    def head(self, key):
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError:
+            return None
+        return {"ContentLength": head.get("ContentLength", 0), "ContentType": head.get("ContentType")}
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def public_url(self, key):
+        return f"https://{self.bucket}.s3.{self.region}.amazonaws.com/{key}"
+
+
+class LocalStorage(ObjectStorage):
+    def __init__(self, root: str, base_url: str, secret: str):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+        self.secret = secret.encode()
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def signature(self, *parts) -> str:
+        message = "\n".join(str(part) for part in parts).encode()
+        return hmac.new(self.secret, message, hashlib.sha256).hexdigest()
+
+    def verify(self, signature: str, expires: int, *parts) -> bool:
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(signature, self.signature(expires, *parts))
+
+    def upload(self, fileobj, key, content_type=None, cache_control=None):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{secrets.token_hex(4)}.tmp"
+        with open(tmp_path, "wb") as f:
+            shutil.copyfileobj(fileobj, f)
+        os.replace(tmp_path, path)
+
+    def download(self, key):
+        try:
+            with open(self.path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def sign(self, key, expiration):
+        expires = int(time.time()) + expiration
+        query = urlencode({"expires": expires, "signature": self.signature(expires, "GET", key)})
+        return f"{self.public_url(key)}?{query}"
+
+    def presign_post(self, key, content_type, max_bytes, expiration):
+        expires = int(time.time()) + expiration
+        fields = {
+            "key": key,
+            "Content-Type": content_type,
+            "maxBytes": str(max_bytes),
+            "expires": str(expires),
+            "signature": self.signature(expires, "POST", key, content_type, max_bytes),
+        }
+        return {"url": f"{self.base_url}/files", "fields": fields}
+
+    def head(self, key):
+        try:
+            size = os.path.getsize(self.path(key))
+        except (FileNotFoundError, ValueError):
+            return None
+        return {"ContentLength": size, "ContentType": None}
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def public_url(self, key):
+        return f"{self.base_url}/files/{quote(key)}"
+
+
+def create_storage() -> ObjectStorage:
+    if settings.storage_backend == "local":
+        return LocalStorage(
+            settings.local_storage_root,
+            settings.local_storage_base_url,
+            # Without a configured secret, signed URLs are only valid for this process.
+            settings.storage_signing_secret or secrets.token_hex(32)
+        )
+    return S3Storage()
+
+
+storage = create_storage()
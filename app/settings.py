@@ -1,15 +1,36 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field
+from typing import Optional
 
 class Settings(BaseSettings):
-    aws_access_key: str
-    aws_secret_key: str
-    aws_bucket_name: str
-    aws_region: str
+    # Only required with STORAGE_BACKEND=s3
+    aws_access_key: Optional[str] = None
+    aws_secret_key: Optional[str] = None
+    aws_bucket_name: Optional[str] = None
+    aws_region: Optional[str] = None
 
     sendgrid_api_key: str = Field(..., alias="SENDGRID_API_KEY")  # <- add this
     sender_email: str = Field("no-reply@girlcode.com", alias="SENDER_EMAIL")  # optional, defaults
 
+    # Generated resume PDF cache: "disk" (per instance) or "s3" (shared)
+    resume_cache_backend: str = "disk"
+    resume_cache_dir: str = "/tmp/talent-resume-cache"
+    resume_cache_max_entries: int = 500
+
+    # In-process cache of serialised job responses
+    response_cache_ttl: float = 30
+    response_cache_max_entries: int = 2000
+
+    # Object storage: "s3" or "local" (files served by the API itself, see app/routes/files.py)
+    storage_backend: str = "s3"
+    s3_max_pool_connections: int = 50
+    s3_max_upload_concurrency: int = 4
+    s3_connect_timeout: float = 5
+    s3_read_timeout: float = 30
+    local_storage_root: str = "./local-storage"
+    local_storage_base_url: str = "http://localhost:8000"
+    storage_signing_secret: Optional[str] = None
+
     class Config:
         env_file = ".env"
         extra = "forbid"  # optional, already default in v2 but makes intent clear
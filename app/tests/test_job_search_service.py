@@ -0,0 +1,79 @@
+"""
+Unit tests for the /jobs/search JobSearchIndex.
+"""
+import unittest
+from datetime import date
+
+from app.services.job_search_service import JobSearchIndex
+
+JOBS = {
+    "j1": {"title": "Senior Python Developer", "skills": ["Python", "Docker"], "salary_min": 50000,
+           "salary_max": 70000, "city": "Lagos", "status": "active", "created_at": "2024-01-01"},
+    "j2": {"title": "Frontend Developer", "skills": ["js", "React"], "salary_min": 30000,
+           "salary_max": 40000, "city": "Nairobi", "status": "active", "created_at": "2024-02-01"},
+    "j3": {"title": "Data Scientist", "skills": ["py"], "salary_min": 80000, "city": "lagos",
+           "status": "active", "created_at": "2024-03-01", "application_close_date": date(2000, 1, 1)},
+    "j4": {"title": "Go Engineer", "skills": ["golang"], "status": "closed", "created_at": "2024-04-01",
+           "application_close_date": date(2999, 1, 1)},
+}
+
+
+class JobSearchIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = JobSearchIndex()
+        for job_id, job in JOBS.items():
+            self.index.add(job_id, job)
+
+    def search(self, filters=None, **kwargs):
+        kwargs.setdefault("open_only", False)
+        return self.index.search(filters or {}, **kwargs)[0]
+
+    def test_newest_first_and_closed_jobs(self):
+        self.assertEqual(self.search(), ["j4", "j3", "j2", "j1"])
+        self.assertEqual(self.search(open_only=True), ["j4", "j2", "j1"])
+
+    def test_facet_filters_use_canonical_values(self):
+        self.assertEqual(self.search({"skills": ["python3"]}), ["j3", "j1"])
+        self.assertEqual(self.search({"skills": ["javascript", "go"]}), ["j4", "j2"])
+        self.assertEqual(self.search({"city": [" LAGOS "], "skills": ["Docker"]}), ["j1"])
+        self.assertEqual(self.search({"status": ["Active"]}), ["j3", "j2", "j1"])
+        self.assertEqual(self.search({"city": ["cairo"]}), [])
+
+    def test_title_words(self):
+        self.assertEqual(self.search(query="developer"), ["j2", "j1"])
+        self.assertEqual(self.search(query="Python developer"), ["j1"])
+
+    def test_salary_bounds(self):
+        # salary_min keeps jobs paying at least that much; a missing maximum is unbounded.
+        self.assertEqual(self.search(salary_min=60000), ["j3", "j1"])
+        self.assertEqual(self.search(salary_min=70000), ["j3", "j1"])
+        self.assertEqual(self.search(salary_min=70001), ["j3"])
+        # salary_max keeps jobs starting at no more than that.
+        self.assertEqual(self.search(salary_max=30000), ["j2"])
+        self.assertEqual(self.search(salary_max=29999), [])
+        self.assertEqual(self.search(salary_min=45000, salary_max=55000), ["j1"])
+
+    def test_facet_counts(self):
+        _, facets = self.index.search({"skills": ["python"]}, open_only=False)
+        self.assertEqual(facets["skills"], {"python": 2, "docker": 1})
+        self.assertEqual(facets["city"], {"lagos": 2})
+
+    def test_add_replaces_and_remove_forgets(self):
+        self.index.add("j1", {**JOBS["j1"], "salary_min": 10000, "salary_max": 20000, "skills": ["Rust"]})
+        self.assertEqual(self.search(salary_min=60000), ["j3"])
+        self.assertEqual(self.search(salary_max=20000), ["j1"])
+        self.assertEqual(self.search({"skills": ["python"]}), ["j3"])
+
+        self.index.remove("j3")
+        self.index.remove("missing")
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.search(salary_min=60000), [])
+        self.assertEqual(self.search(query="scientist"), [])
+        ordered, facets = self.index.search({}, open_only=True)
+        self.assertEqual(ordered, ["j4", "j2", "j1"])
+        self.assertNotIn("python", facets["skills"])
+        self.assertEqual(self.index.job("j1")["job_id"], "j1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Unit tests for SummaryChanges, the match summary delta writer.
+"""
+import unittest
+from unittest import mock
+
+from app.models.matched import MatchedJobStatus
+from app.utils.match_summary_helpers import SummaryChanges
+
+
+class RecordingWriter:
+    def __init__(self):
+        self.writes = {}
+
+    def set(self, ref, data, merge=False):
+        assert merge, "summaries must be merged, not overwritten"
+        self.writes[ref] = data
+
+
+def increments(data: dict) -> dict:
+    """The summary update with each Increment replaced by its amount."""
+    result = {key: value for key, value in data.items() if key not in ("total", "statuses")}
+    if "total" in data:
+        result["total"] = data["total"].value
+    if "statuses" in data:
+        result["statuses"] = {status: delta.value for status, delta in data["statuses"].items()}
+    return result
+
+
+class SummaryChangesTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch("app.utils.match_summary_helpers.summary_ref", side_effect=lambda job_id: job_id)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.changes = SummaryChanges()
+
+    def written(self) -> dict:
+        writer = RecordingWriter()
+        self.changes.write(writer)
+        return {job_id: increments(data) for job_id, data in writer.writes.items()}
+
+    def test_new_matches_increment_total_and_status(self):
+        self.changes.record("j1", "Engineer", new_status=MatchedJobStatus.PENDING)
+        self.changes.record("j1", None, new_status="accepted")
+        self.assertEqual(self.written(), {
+            "j1": {"job_id": "j1", "job_title": "Engineer", "total": 2,
+                   "statuses": {"pending": 1, "accepted": 1}},
+        })
+
+    def test_status_change_moves_one_count(self):
+        self.changes.record("j1", old_status="pending", new_status=MatchedJobStatus.ACCEPTED)
+        self.assertEqual(self.written(), {"j1": {"job_id": "j1", "statuses": {"pending": -1, "accepted": 1}}})
+
+    def test_removal_decrements(self):
+        self.changes.record("j1", "Engineer", old_status="viewed")
+        self.assertEqual(self.written(), {
+            "j1": {"job_id": "j1", "job_title": "Engineer", "total": -1, "statuses": {"viewed": -1}},
+        })
+
+    def test_add_then_remove_cancels_out(self):
+        self.changes.record("j1", "Engineer", new_status="pending")
+        self.changes.record("j1", old_status="pending")
+        self.assertEqual(self.written(), {"j1": {"job_id": "j1", "job_title": "Engineer"}})
+
+    def test_jobs_are_kept_apart_and_missing_ids_ignored(self):
+        self.changes.record("j1", "Engineer", new_status="pending")
+        self.changes.record("j2", "Designer", new_status="pending")
+        self.changes.record(None, "Ghost", new_status="pending")
+        self.assertEqual(len(self.changes), 2)
+        self.assertEqual(set(self.written()), {"j1", "j2"})
+
+
+if __name__ == "__main__":
+    unittest.main()
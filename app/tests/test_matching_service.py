@@ -0,0 +1,131 @@
+"""
+Unit tests for the candidate matching indexes (SkillIndex and PreferenceIndex).
+"""
+import itertools
+import unittest
+
+from app.services.matching_service import (
+    ONSITE, REMOTE, CandidatePreferences, JobRequirements, PreferenceIndex, SkillIndex,
+    candidate_preferences, preferences_match,
+)
+from app.services.skill_service import skill_bits
+
+
+class SkillIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = SkillIndex()
+        self.index.add("all", [1, 2, 3])
+        self.index.add("common", [1])
+        self.index.add("rare", [3])
+        self.index.add("other", [4])
+
+    def test_ranks_by_weighted_share_of_job_skills(self):
+        self.index.add("also common", [1])
+        ranked = self.index.score([1, 3])
+        self.assertEqual([candidate_id for _, candidate_id in ranked], ["all", "rare", "common", "also common"])
+        self.assertAlmostEqual(ranked[0][0], 1.0)
+        # Skill 3 is held by fewer candidates than skill 1, so it is worth more.
+        self.assertGreater(ranked[1][0], ranked[2][0])
+        self.assertAlmostEqual(ranked[2][0], ranked[3][0])
+
+    def test_score_matches_overlap_score(self):
+        job = [1, 2, 3]
+        for score, candidate_id in self.index.score(job, top_k=None):
+            self.assertAlmostEqual(score, self.index.overlap_score(job, self.index.candidate_bits(candidate_id)))
+        self.assertEqual(self.index.overlap_score(job, self.index.candidate_bits("other")), 0.0)
+
+    def test_top_k_min_score_and_candidate_ids(self):
+        self.assertEqual(len(self.index.score([1, 3], top_k=1)), 1)
+        self.assertEqual(len(self.index.score([1, 3], top_k=None)), 3)
+        common_score = dict((cid, score) for score, cid in self.index.score([1, 3]))["common"]
+        self.assertNotIn("common", [cid for _, cid in self.index.score([1, 3], min_score=common_score)])
+        restricted = self.index.score([1, 3], candidate_ids={"common", "other"})
+        self.assertEqual([cid for _, cid in restricted], ["common"])
+
+    def test_job_without_skills_matches_nobody(self):
+        self.assertEqual(self.index.score([]), [])
+        self.assertEqual(self.index.overlap_score([], skill_bits([1])), 0.0)
+
+    def test_add_replaces_and_remove_forgets(self):
+        self.index.add("all", [4])
+        self.assertEqual(self.index.candidate_bits("all"), skill_bits([4]))
+        self.assertNotIn("all", [cid for _, cid in self.index.score([1, 2, 3])])
+        self.assertEqual(self.index.sharing_any(skill_bits([4])), {"all", "other"})
+
+        self.index.remove("all")
+        self.index.remove("missing")
+        self.assertNotIn("all", self.index)
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.sharing_any(skill_bits([4])), {"other"})
+        self.assertEqual(self.index.candidate_bits("all"), 0)
+
+
+SALARIES = [None, (30000.0, 50000.0), (50000.0, 70000.0), (80000.0, float("inf"))]
+MODES = [frozenset((REMOTE,)), frozenset((ONSITE,)), frozenset((REMOTE, ONSITE))]
+PLACES = [(None, None), ("lagos", "nigeria"), ("lagos", None), (None, "nigeria"), ("nairobi", "kenya")]
+
+
+def all_preferences():
+    for salary, modes, (city, country), relocate in itertools.product(SALARIES, MODES, PLACES, (False, True)):
+        yield CandidatePreferences(salary=salary, modes=modes, city=city, country=country, relocate=relocate)
+
+
+def all_requirements():
+    for salary, remote, (city, country) in itertools.product(SALARIES, (False, True), PLACES):
+        yield JobRequirements(salary=salary, remote=remote, city=city, country=country)
+
+
+class PreferenceIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = PreferenceIndex()
+        self.preferences = {f"c{i}": preferences for i, preferences in enumerate(all_preferences())}
+        for candidate_id, preferences in self.preferences.items():
+            self.index.add(candidate_id, preferences)
+
+    def assert_agrees_with_preferences_match(self):
+        for requirements in all_requirements():
+            expected = {cid for cid, preferences in self.preferences.items()
+                        if preferences_match(preferences, requirements)}
+            self.assertEqual(self.index.eligible(requirements), expected, requirements)
+
+    def test_eligible_matches_preferences_match(self):
+        self.assert_agrees_with_preferences_match()
+
+    def test_salary_bounds_are_inclusive(self):
+        expects = CandidatePreferences(salary=(50000.0, 70000.0), modes=frozenset((REMOTE,)),
+                                       city=None, country=None, relocate=False)
+        for offered, fits in (((70000.0, 90000.0), True), ((30000.0, 50000.0), True),
+                              ((70001.0, 90000.0), False), ((30000.0, 49999.0), False)):
+            requirements = JobRequirements(salary=offered, remote=True, city=None, country=None)
+            self.assertEqual(preferences_match(expects, requirements), fits, offered)
+
+    def test_remove_and_re_add_stay_consistent(self):
+        for candidate_id in list(self.preferences)[::2]:
+            self.index.remove(candidate_id)
+            del self.preferences[candidate_id]
+        self.index.remove("missing")
+        moved = CandidatePreferences(salary=(10000.0, 20000.0), modes=frozenset((ONSITE,)),
+                                     city="nairobi", country="kenya", relocate=False)
+        for candidate_id in list(self.preferences)[::3]:
+            self.index.add(candidate_id, moved)
+            self.preferences[candidate_id] = moved
+
+        self.assertEqual(len(self.index), len(self.preferences))
+        self.assert_agrees_with_preferences_match()
+
+    def test_candidate_preferences_combines_job_preferences(self):
+        preferences = candidate_preferences({
+            "basicInfo": {"city": " Lagos ", "country": "Nigeria"},
+            "jobPreference": [
+                {"minSalary": 40000, "maxSalary": 60000, "workLocation": "Remote"},
+                {"minSalary": 50000, "maxSalary": 0, "workLocation": "On-site", "relocate": "Yes"},
+            ],
+        })
+        self.assertEqual(preferences.salary, (40000.0, float("inf")))
+        self.assertEqual(preferences.modes, frozenset((REMOTE, ONSITE)))
+        self.assertEqual((preferences.city, preferences.country), ("lagos", "nigeria"))
+        self.assertTrue(preferences.relocate)
+
+
+if __name__ == "__main__":
+    unittest.main()
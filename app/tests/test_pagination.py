@@ -0,0 +1,53 @@
+"""
+Unit tests for the keyset pagination cursor helpers.
+"""
+import base64
+import unittest
+from datetime import datetime
+
+from fastapi import HTTPException
+
+from app.utils.pagination import cursor_offset, decode_cursor, encode_cursor
+
+
+class CursorTest(unittest.TestCase):
+    def test_round_trip(self):
+        state = {"id": "doc/with+chars", "created_at": "2024-01-01T00:00:00", "c": 1}
+        cursor = encode_cursor(state)
+        self.assertNotIn("=", cursor)
+        self.assertEqual(decode_cursor(cursor), state)
+
+    def test_values_are_encoded_as_strings(self):
+        created_at = datetime(2024, 1, 2, 3, 4, 5)
+        self.assertEqual(decode_cursor(encode_cursor({"created_at": created_at})), {"created_at": str(created_at)})
+
+    def test_missing_cursor_starts_at_the_beginning(self):
+        self.assertEqual(decode_cursor(None), {})
+        self.assertEqual(decode_cursor(""), {})
+
+    def test_malformed_cursor_is_a_400(self):
+        not_a_dict = base64.urlsafe_b64encode(b"[1, 2]").decode()
+        wrong_types = [encode_cursor(state) for state in (
+            {"id": 7}, {"id": {"path": "x"}}, {"created_at": ["2024"], "id": "a"}, {"c": "1"}, {"c": -1},
+            {"offset": 1.5}, {"offset": False},
+        )]
+        for cursor in ["%%%", "bm90IGpzb24", not_a_dict, "é"] + wrong_types:
+            with self.assertRaises(HTTPException) as raised:
+                decode_cursor(cursor)
+            self.assertEqual(raised.exception.status_code, 400, cursor)
+
+
+class CursorOffsetTest(unittest.TestCase):
+    def test_offset_round_trip(self):
+        self.assertEqual(cursor_offset(decode_cursor(encode_cursor({"offset": 50}))), 50)
+        self.assertEqual(cursor_offset({}), 0)
+
+    def test_invalid_offset_is_a_400(self):
+        for offset in ("x", -1, 1.5, True, None, [1]):
+            with self.assertRaises(HTTPException) as raised:
+                cursor_offset(decode_cursor(encode_cursor({"offset": offset})))
+            self.assertEqual(raised.exception.status_code, 400, offset)
+
+
+if __name__ == "__main__":
+    unittest.main()
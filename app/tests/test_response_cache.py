@@ -0,0 +1,73 @@
+"""
+Unit tests for the serialised ResponseCache.
+"""
+import unittest
+from unittest import mock
+
+from app.utils.response_cache import ResponseCache
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("app.utils.response_cache.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = ResponseCache(ttl=60, max_entries=2)
+
+    def test_entries_expire_after_ttl(self):
+        self.cache.set("a", b"1", ["jobs"])
+        self.now += 60
+        self.assertEqual(self.cache.get("a"), b"1")
+        self.now += 1
+        self.assertIsNone(self.cache.get("a"))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.set("a", b"1", [])
+        self.cache.set("b", b"2", [])
+        self.cache.get("a")
+        self.cache.set("c", b"3", [])
+        self.assertEqual(self.cache.get("a"), b"1")
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("c"), b"3")
+
+    def test_invalidate_drops_tagged_entries_only(self):
+        self.cache.set("list", b"[]", ["jobs"])
+        self.cache.set("one", b"{}", ["jobs", "job:1"])
+        self.cache.invalidate("job:1", "unknown")
+        self.assertIsNone(self.cache.get("one"))
+        self.assertEqual(self.cache.get("list"), b"[]")
+        self.cache.invalidate("jobs")
+        self.assertIsNone(self.cache.get("list"))
+
+    def test_set_replaces_tags(self):
+        self.cache.set("one", b"old", ["job:1"])
+        self.cache.set("one", b"new", ["job:2"])
+        self.cache.invalidate("job:1")
+        self.assertEqual(self.cache.get("one"), b"new")
+        self.cache.invalidate("job:2")
+        self.assertIsNone(self.cache.get("one"))
+
+    def test_read_racing_an_invalidation_is_not_cached(self):
+        generation = self.cache.generation()
+        self.cache.invalidate("job:1")
+        self.cache.set("one", b"old", ["job:1"], generation)
+        self.assertIsNone(self.cache.get("one"))
+
+        self.cache.set("list", b"[]", ["jobs"], generation)
+        self.assertEqual(self.cache.get("list"), b"[]")
+        self.cache.set("one", b"new", ["job:1"], self.cache.generation())
+        self.assertEqual(self.cache.get("one"), b"new")
+
+    def test_read_older_than_forgotten_invalidations_is_not_cached(self):
+        generation = self.cache.generation()
+        self.cache.invalidate("job:1")
+        self.cache.invalidate("job:2", "job:3")
+        self.cache.set("other", b"{}", ["job:4"], generation)
+        self.assertIsNone(self.cache.get("other"))
+        self.cache.set("other", b"{}", ["job:4"], self.cache.generation())
+        self.assertEqual(self.cache.get("other"), b"{}")
+
+
+if __name__ == "__main__":
+    unittest.main()
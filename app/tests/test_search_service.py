@@ -0,0 +1,61 @@
+"""
+Unit tests for the admin search TrigramIndex.
+"""
+import unittest
+
+from app.services.search_service import TrigramIndex
+
+
+class TrigramIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = TrigramIndex(["name", "email"])
+        self.index.add_document("amy", {"name": "Amy Smith", "email": "amy@y.com", "status": "active"})
+        self.index.add_document("bob", {"name": "Bob Jones", "email": "Bob@X.com", "status": "inactive"})
+        self.index.add_document("xav", {"name": "Xavier", "email": "xav@x.com", "status": "active"})
+        self.index.add_document("maj", {"name": "Major", "email": "m@z.com"})
+        self.index.add_document("ted", {"name": "Ted Onesmo", "email": "ted@w.org"})
+
+    def test_matches_query_as_substring(self):
+        self.assertEqual(self.index.search("x.com"), ["bob", "xav"])
+        self.assertEqual(self.index.search("  X.COM "), ["bob", "xav"])
+        self.assertEqual(self.index.search("y.co"), ["amy"])
+        self.assertEqual(self.index.search("q"), [])
+        self.assertEqual(self.index.search(""), [])
+
+    def test_short_queries_match_mid_word(self):
+        self.assertEqual(self.index.search("i"), ["amy", "xav"])
+        self.assertEqual(self.index.search("th"), ["amy"])
+
+    def test_word_prefix_matches_rank_first(self):
+        self.assertEqual(self.index.search("jo"), ["bob", "maj"])
+        self.assertEqual(self.index.search("ones"), ["ted", "bob"])
+
+    def test_status_filter(self):
+        self.assertEqual(self.index.search("x.com", status="active"), ["xav"])
+        self.assertEqual(self.index.search("x.com", status="inactive"), ["bob"])
+
+    def test_partial_write_keeps_other_fields(self):
+        self.index.apply("bob", {"email": "bob@z.com"})
+        self.assertEqual(self.index.search("x.com"), ["xav"])
+        self.assertEqual(self.index.search("jones"), ["bob"])
+        self.assertEqual(self.index.search("bob", status="inactive"), ["bob"])
+
+    def test_nested_fields(self):
+        index = TrigramIndex(["basicInfo.firstName", "basicInfo.email"])
+        index.add_document("c1", {"basicInfo": {"firstName": "Thandi", "email": "t@x.com"}})
+        index.apply("c1", {"basicInfo.email": "t@y.com"})
+        self.assertEqual(index.search("y.com"), ["c1"])
+        index.apply("c1", {"basicInfo": {"firstName": "Lerato"}})
+        self.assertEqual(index.search("thandi"), [])
+        self.assertEqual(index.search("lerato"), ["c1"])
+
+    def test_remove(self):
+        self.index.remove("xav")
+        self.index.remove("missing")
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.index.search("x.com"), ["bob"])
+        self.assertEqual(self.index.search("xav"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+"""
+Unit tests for skill canonicalisation and skill ids.
+"""
+import unittest
+
+from app.services.skill_service import SKILL_VOCABULARY, canonical_skills, skill_ids, skill_ids_of, skill_name
+
+
+class SkillIdsTest(unittest.TestCase):
+    def test_aliases_share_an_id(self):
+        self.assertEqual(canonical_skills(["Python3", " py ", "JS"]), ["python", "javascript"])
+        self.assertEqual(skill_ids(["py"]), skill_ids(["Python"]))
+
+    def test_only_vocabulary_ids_are_stored(self):
+        self.assertEqual(skill_ids(["Cobol", "Python"]), skill_ids(["Python"]))
+
+    def test_free_text_skills_still_match(self):
+        candidate = skill_ids_of({"skills": ["COBOL", "Python"], "skillIds": skill_ids(["Python"])}, "skillIds")
+        job = skill_ids_of({"skills": [" cobol "]}, "skill_ids")
+        self.assertEqual(len(job), 1)
+        self.assertGreater(job[0], len(SKILL_VOCABULARY))
+        self.assertIn(job[0], candidate)
+        self.assertEqual(skill_name(job[0]), "cobol")
+
+    def test_stored_ids_outside_the_vocabulary_are_ignored(self):
+        data = {"skills": ["Python"], "skillIds": skill_ids(["Python"]) + [10 ** 6]}
+        self.assertEqual(skill_ids_of(data, "skillIds"), skill_ids(["Python"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,24 +1,54 @@
 from firebase_admin import firestore
 from fastapi import HTTPException
 from app.firebase import db
+from app.utils.email_index import fetch_user_doc
 
-def fetch_candidate_by_email(email: str):
+async def fetch_candidate_by_email(email: str):
     email = email.strip().lower()
     print("Searching for email:", email)
 
-    candidates_ref = db.collection("candidate")
-    query = candidates_ref.where("basicInfo.email", "==", email).stream()
+    doc = await fetch_user_doc("candidate", email)
+    if not doc:
+        print("No candidate matched the email.")
+        return None
 
-    found = False
-    for doc in query:
-        found = True
-        candidate = doc.to_dict()
-        candidate["id"] = doc.id
-        print("Candidate found:", candidate)
-        return candidate
+    candidate = doc.to_dict()
+    candidate["id"] = doc.id
+    return candidate
 
-    if not found:
-        print("No candidate matched the email.")
 
-    return None
+# Concurrent uploads for the same candidate retry instead of overwriting each other.
+EDUCATION_FILE_MAX_ATTEMPTS = 5
+
+
+@firestore.async_transactional
+async def _set_education_file(transaction, candidate_ref, index: int, file_key: str):
+    # Only the education array is read; Firestore cannot address a single array
+    # element, so the array is written back as read, with one fileUrl changed.
+    snapshot = await candidate_ref.get(field_paths=["education"], transaction=transaction)
+    if not snapshot.exists:
+        raise HTTPException(status_code=404, detail="Candidate not found")
+
+    education_list = (snapshot.to_dict() or {}).get("education", [])
+
+    # Auto-extend the list to ensure the index is valid
+    while len(education_list) <= index:
+        education_list.append({
+            "institution": "",
+            "degree": "",
+            "fileUrl": ""
+        })
+
+    # Update fileUrl at the correct index
+    education_list[index]["fileUrl"] = file_key
+
+    transaction.update(candidate_ref, {"education": education_list})
+
 
+async def attach_education_file(candidate_ref, index: int, file_key: str):
+    """
+    Sets education[index].fileUrl on the candidate, padding the list if needed.
+    Runs in a transaction so sibling entries written concurrently are never lost.
+    """
+    transaction = db.transaction(max_attempts=EDUCATION_FILE_MAX_ATTEMPTS)
+    await _set_education_file(transaction, candidate_ref, index, file_key)
@@ -0,0 +1,164 @@
+"""
+Email -> document id index shared by every profile lookup.
+
+Handlers only know a user's email, but Firestore writes need the document id.
+Every user document carries ``emailKey``, the normalised (trimmed, lowercased) email,
+so a lookup is a single equality query however the address was typed. Resolved ids
+are kept in a small in-process TTL/LRU cache so repeated writes for the same user
+skip that query.
+
+Documents written before ``emailKey`` existed are still found through their stored
+email and get the key on first lookup; backfill_email_keys() adds it to all of them.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from app.firebase import db
+from app.utils.pagination import EXPORT_BATCH_SIZE, iter_documents
+
+# Field holding the email address in each user collection.
+EMAIL_FIELDS = {
+    "candidate": "basicInfo.email",
+    "employer": "email",
+    "admin": "email",
+}
+EMAIL_KEY_FIELD = "emailKey"
+
+CACHE_TTL_SECONDS = 15 * 60
+CACHE_MAX_ENTRIES = 10_000
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def normalize_email(email: str) -> str:
+    return (email or "").strip().lower()
+
+
+def email_key(email: Optional[str]) -> dict:
+    """The emailKey field to store alongside a user's email ({} when there is no email)."""
+    key = normalize_email(email)
+    return {EMAIL_KEY_FIELD: key} if key else {}
+
+
+def _cache_get(key):
+    with _lock:
+        entry = _cache.get(key)
+        if entry is None:
+            return None
+        doc_id, expires_at = entry
+        if expires_at < time.monotonic():
+            del _cache[key]
+            return None
+        _cache.move_to_end(key)
+        return doc_id
+
+
+def remember_user_id(collection: str, email: str, doc_id: str):
+    """Stores the document id for an email, e.g. right after signup."""
+    key = (collection, normalize_email(email))
+    with _lock:
+        _cache[key] = (doc_id, time.monotonic() + CACHE_TTL_SECONDS)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+
+def forget_user_id(collection: str, email: str):
+    """Drops a cached mapping, e.g. when the user's email changes."""
+    with _lock:
+        _cache.pop((collection, normalize_email(email)), None)
+
+
+def _email_variants(email: str):
+    # Documents without emailKey hold the email as it was typed; these spellings
+    # cover the ones written through paths that trim or lowercase it.
+    variants = []
+    for value in (email, email.strip(), normalize_email(email)):
+        if value and value not in variants:
+            variants.append(value)
+    return variants
+
+
+async def _query_user_doc(collection: str, email: str, field_paths: Optional[List[str]]):
+    key = normalize_email(email)
+    ref = db.collection(collection)
+    query = ref.where(EMAIL_KEY_FIELD, "==", key)
+    if field_paths is not None:
+        query = query.select(field_paths)
+    async for doc in query.limit(1).stream():
+        return doc
+
+    # Not backfilled yet: match the stored spelling, then give the document its key.
+    legacy = ref.where(EMAIL_FIELDS.get(collection, "email"), "in", _email_variants(email))
+    if field_paths is not None:
+        legacy = legacy.select(field_paths)
+    async for doc in legacy.limit(1).stream():
+        await doc.reference.update({EMAIL_KEY_FIELD: key})
+        return doc
+
+    return None
+
+
+async def resolve_user_id(collection: str, email: Optional[str]) -> Optional[str]:
+    """
+    Returns the id of the document in `collection` whose email matches, or None.
+    """
+    if not normalize_email(email):
+        return None
+    doc_id = _cache_get((collection, normalize_email(email)))
+    if doc_id:
+        return doc_id
+
+    doc = await _query_user_doc(collection, email, [EMAIL_KEY_FIELD])
+    if doc is None:
+        return None
+    remember_user_id(collection, email, doc.id)
+    return doc.id
+
+
+async def fetch_user_doc(collection: str, email: str, field_paths: Optional[List[str]] = None):
+    """
+    Fetches the document snapshot for the email, or None if missing. Either way this is
+    one read: by id when the id is cached, otherwise the email query's own result.
+    `field_paths` limits the fields Firestore returns (None fetches everything).
+    """
+    if not normalize_email(email):
+        return None
+    doc_id = _cache_get((collection, normalize_email(email)))
+    if doc_id:
+        doc = await db.collection(collection).document(doc_id).get(field_paths=field_paths)
+        if doc.exists:
+            return doc
+        # Cached id points at a deleted document: drop it and query instead.
+        forget_user_id(collection, email)
+
+    doc = await _query_user_doc(collection, email, field_paths)
+    if doc is None:
+        return None
+    remember_user_id(collection, email, doc.id)
+    return doc
+
+
+async def backfill_email_keys(collection: str) -> int:
+    """Sets emailKey on every document of `collection` lacking it. Returns the number updated."""
+    field = EMAIL_FIELDS.get(collection, "email")
+    ref = db.collection(collection)
+    batch, pending, updated = db.batch(), 0, 0
+    async for doc in iter_documents(ref, ref.select([field, EMAIL_KEY_FIELD])):
+        data = doc.to_dict() or {}
+        email = (data.get("basicInfo") or {}).get("email") if collection == "candidate" else data.get(field)
+        key = email_key(email)
+        if not key or data.get(EMAIL_KEY_FIELD) == key[EMAIL_KEY_FIELD]:
+            continue
+        batch.update(doc.reference, key)
+        pending += 1
+        if pending == EXPORT_BATCH_SIZE:
+            await batch.commit()
+            batch, updated, pending = db.batch(), updated + pending, 0
+    if pending:
+        await batch.commit()
+    return updated + pending
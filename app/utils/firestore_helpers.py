@@ -1,3 +1,41 @@
+import logging
+from typing import List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.utils.s3_helpers import create_thumbnails_for_key
+
+logger = logging.getLogger("uvicorn")
+
+
 def get_user_collection(user_type: str, db):
     # Can be "candidate", "employer", or "admin"
-    return db.collection(user_type.lower())
\ No newline at end of file
+    return db.collection(user_type.lower())
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Turns a comma separated `fields=` query value (e.g. "basicInfo.firstName,skills")
+    into Firestore field paths for `select()` / `get(field_paths=...)`.
+    Returns None when no projection was requested, meaning "whole document".
+    """
+    if not fields:
+        return None
+    paths = []
+    for path in fields.split(","):
+        path = path.strip()
+        if path and path not in paths:
+            paths.append(path)
+    return paths or None
+
+
+async def store_thumbnails(doc_ref, field: str, key: str):
+    """
+    Background task: thumbnails an image that was uploaded directly to S3 and
+    records the variants as `<field>Thumbnails` on the document.
+    """
+    try:
+        thumbnails = await run_in_threadpool(create_thumbnails_for_key, key)
+        await doc_ref.update({f"{field}Thumbnails": thumbnails})
+    except Exception as e:
+        logger.error(f"Thumbnail generation failed for {key}: {e}")
@@ -1,10 +1,118 @@
+"""
+Error log shipping to the Firestore "logs" collection.
+
+log_error only appends to a bounded in-memory buffer, so it never waits on Firestore.
+A background task drains the buffer in batched writes of up to LOG_BATCH_SIZE entries.
+When the buffer is full the oldest entries are dropped and counted in `dropped_entries`;
+entries whose batch fails to commit, or is interrupted, are put back while there is room.
+stop_log_shipper() lets the task finish its current batch and then writes out the rest.
+"""
+
+import asyncio
+import logging
+from collections import deque
 from datetime import datetime
+from typing import Optional
+
 from app.firebase import db
 
+logger = logging.getLogger("uvicorn")
+
+LOGS = "logs"
+LOG_BUFFER_SIZE = 10_000
+LOG_BATCH_SIZE = 500  # Firestore's limit on writes per batch
+LOG_FLUSH_INTERVAL = 1.0
+
+_buffer = deque(maxlen=LOG_BUFFER_SIZE)
+dropped_entries = 0
+shipped_entries = 0
+
+_wakeup: Optional[asyncio.Event] = None  # created on first use, inside the running event loop
+_shipper: Optional[asyncio.Task] = None
+_stopping = False
+
+
+def _enqueue(entries):
+    global dropped_entries
+    overflow = len(_buffer) + len(entries) - LOG_BUFFER_SIZE
+    if overflow > 0:
+        dropped_entries += overflow
+    _buffer.extend(entries)
+
+
+def _requeue(entries):
+    """Puts back entries taken from the front; newer entries buffered meanwhile win."""
+    global dropped_entries
+    room = LOG_BUFFER_SIZE - len(_buffer)
+    kept = entries[-room:] if room > 0 else []
+    dropped_entries += len(entries) - len(kept)
+    _buffer.extendleft(reversed(kept))
+
+
 async def log_error(message: str, context: dict = None):
     log_entry = {
         "message": message,
         "timestamp": datetime.utcnow().isoformat(),
         "context": context or {},
     }
-    db.collection("logs").add(log_entry)
+    _enqueue([log_entry])
+    if _shipper is None and not _stopping:
+        start_log_shipper()
+    if _wakeup is not None and len(_buffer) >= LOG_BATCH_SIZE:
+        _wakeup.set()
+
+
+async def flush_logs() -> bool:
+    """Writes out everything buffered. Returns False if a batch failed (its entries are re-buffered)."""
+    global shipped_entries
+    while _buffer:
+        entries = [_buffer.popleft() for _ in range(min(LOG_BATCH_SIZE, len(_buffer)))]
+        batch = db.batch()
+        for entry in entries:
+            batch.set(db.collection(LOGS).document(), entry)
+        try:
+            await batch.commit()
+        except BaseException as e:
+            # Also on cancellation, so a batch interrupted mid-commit is not lost.
+            _requeue(entries)
+            if not isinstance(e, Exception):
+                raise
+            logger.warning(f"Could not ship {len(entries)} log entries: {e}")
+            return False
+        shipped_entries += len(entries)
+    return True
+
+
+async def _ship_logs():
+    while not _stopping:
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=LOG_FLUSH_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
+        await flush_logs()
+
+
+def start_log_shipper():
+    global _wakeup, _shipper, _stopping
+    _stopping = False
+    if _wakeup is None:
+        _wakeup = asyncio.Event()
+    if _shipper is None:
+        _shipper = asyncio.create_task(_ship_logs())
+
+
+async def stop_log_shipper():
+    """
+    Stops the background shipper after its current batch and writes out what is still
+    buffered. log_error keeps buffering afterwards but no longer starts a shipper.
+    """
+    global _shipper, _stopping
+    _stopping = True
+    if _shipper is not None:
+        _wakeup.set()
+        await _shipper
+        _shipper = None
+    await flush_logs()
+    if dropped_entries:
+        logger.warning(f"{dropped_entries} log entries were dropped")
@@ -0,0 +1,147 @@
+"""
+Materialised per-job match summaries.
+
+matched_job_summary/{job_id} holds {"job_id", "job_title", "total", "statuses": {status: count}}
+for the matched_jobs documents of one job. Every write that adds, removes or re-statuses
+a matched job records its delta with Increment in the same batch or transaction, so the
+summary is never read-modify-written. rebuild_match_summaries() recomputes everything
+from matched_jobs should the two ever drift apart.
+"""
+
+import asyncio
+from collections import Counter
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+from firebase_admin import firestore
+
+from app.firebase import db
+from app.utils.email_index import normalize_email
+from app.models.matched import MatchedJobStatus
+
+MATCHED_JOBS = "matched_jobs"
+MATCH_SUMMARY = "matched_job_summary"
+REBUILD_CONCURRENCY = 10
+
+
+def summary_ref(job_id: str):
+    return db.collection(MATCH_SUMMARY).document(job_id)
+
+
+def status_value(status) -> str:
+    return getattr(status, "value", status) or MatchedJobStatus.PENDING.value
+
+
+def summary_response(data: Optional[dict]) -> dict:
+    """A summary document as returned by the API, with every known status present."""
+    data = data or {}
+    statuses = {status.value: 0 for status in MatchedJobStatus}
+    statuses.update(data.get("statuses") or {})
+    return {"job_title": data.get("job_title"), "total": data.get("total", 0), "statuses": statuses}
+
+
+class SummaryChanges:
+    """
+    Collects matched job additions, removals and status changes, and writes the net
+    change of each affected summary as one merge of Increments.
+    """
+
+    def __init__(self):
+        self._titles: Dict[str, Optional[str]] = {}
+        self._totals = Counter()
+        self._statuses: Dict[str, Counter] = {}
+
+    def record(self, job_id: Optional[str], job_title: Optional[str] = None,
+               old_status=None, new_status=None):
+        """`old_status` None means the matched job is new; `new_status` None that it was removed."""
+        if not job_id:
+            return
+        if job_title or job_id not in self._titles:
+            self._titles[job_id] = job_title
+        statuses = self._statuses.setdefault(job_id, Counter())
+        if old_status is not None:
+            statuses[status_value(old_status)] -= 1
+        else:
+            self._totals[job_id] += 1
+        if new_status is not None:
+            statuses[status_value(new_status)] += 1
+        else:
+            self._totals[job_id] -= 1
+
+    def __len__(self):
+        return len(self._titles)
+
+    def write(self, writer):
+        """Adds the summary updates to `writer`, a WriteBatch or Transaction."""
+        for job_id, job_title in self._titles.items():
+            data = {"job_id": job_id}
+            if job_title:
+                data["job_title"] = job_title
+            if self._totals[job_id]:
+                data["total"] = firestore.Increment(self._totals[job_id])
+            statuses = {status: firestore.Increment(delta) for status, delta in self._statuses[job_id].items() if delta}
+            if statuses:
+                data["statuses"] = statuses
+            writer.set(summary_ref(job_id), data, merge=True)
+
+
+@firestore.async_transactional
+async def _set_match_status(transaction, match_ref, status: str, candidate_email: Optional[str]):
+    snapshot = await match_ref.get(field_paths=["job_id", "job_title", "status", "candidate_email"],
+                                   transaction=transaction)
+    data = (snapshot.to_dict() or {}) if snapshot.exists else None
+    if data is None or (candidate_email is not None and
+                        normalize_email(data.get("candidate_email")) != normalize_email(candidate_email)):
+        raise HTTPException(status_code=404, detail="Matched job not found")
+
+    transaction.update(match_ref, {"status": status})
+
+    changes = SummaryChanges()
+    changes.record(data.get("job_id"), data.get("job_title"), data.get("status") or MatchedJobStatus.PENDING, status)
+    changes.write(transaction)
+
+
+async def set_match_status(match_id: str, status: str, candidate_email: Optional[str] = None):
+    """
+    Changes a matched job's status and its job summary in one transaction. With
+    `candidate_email`, a matched job of another candidate is reported as not found.
+    """
+    await _set_match_status(db.transaction(), db.collection(MATCHED_JOBS).document(match_id), status_value(status),
+                            candidate_email)
+
+
+@firestore.async_transactional
+async def _rebuild_summary(transaction, job_id: str) -> bool:
+    # Reading the job's matched_jobs inside the transaction makes any concurrent write
+    # to them (and so to the summary's Increments) conflict and retry this rebuild.
+    query = db.collection(MATCHED_JOBS).where("job_id", "==", job_id).select(["job_title", "status"])
+    summary = {"job_id": job_id, "job_title": None, "total": 0, "statuses": Counter()}
+    async for doc in query.stream(transaction=transaction):
+        data = doc.to_dict() or {}
+        summary["job_title"] = summary["job_title"] or data.get("job_title")
+        summary["total"] += 1
+        summary["statuses"][status_value(data.get("status"))] += 1
+
+    if not summary["total"]:
+        transaction.delete(summary_ref(job_id))
+        return False
+    transaction.set(summary_ref(job_id), {**summary, "statuses": dict(summary["statuses"])})
+    return True
+
+
+async def rebuild_match_summaries() -> int:
+    """
+    Recomputes every summary from matched_jobs, one transaction per job so writes made
+    meanwhile are not overwritten. Returns the number of jobs summarised.
+    """
+    job_ids = {(doc.to_dict() or {}).get("job_id")
+               async for doc in db.collection(MATCHED_JOBS).select(["job_id"]).stream()}
+    job_ids |= {doc.id async for doc in db.collection(MATCH_SUMMARY).select([]).stream()}
+    job_ids = sorted(filter(None, job_ids))
+
+    summarised = 0
+    for start in range(0, len(job_ids), REBUILD_CONCURRENCY):
+        chunk = job_ids[start:start + REBUILD_CONCURRENCY]
+        results = await asyncio.gather(*(_rebuild_summary(db.transaction(), job_id) for job_id in chunk))
+        summarised += sum(results)
+    return summarised
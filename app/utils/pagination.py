@@ -0,0 +1,95 @@
+"""
+Keyset pagination and streamed JSON helpers for list endpoints.
+
+Pages are ordered by document id so the order is stable and each page is a single
+`start_after` query. Cursors are opaque to clients: base64 encoded JSON holding
+whatever the endpoint needs to resume (at least the last document id).
+"""
+
+import base64
+import json
+from typing import AsyncIterator, Optional
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+
+DOCUMENT_ID = "__name__"
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+EXPORT_BATCH_SIZE = 500
+
+# Types of the values cursors carry: positions ("c", "offset") are non-negative ints.
+CURSOR_FIELDS = {"id": str, "created_at": (str, type(None)), "c": int, "offset": int}
+
+
+def encode_cursor(state: dict) -> str:
+    raw = json.dumps(state, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> dict:
+    if not cursor:
+        return {}
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(state, dict) or not all(_valid_field(key, value) for key, value in state.items()):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return state
+
+
+def _valid_field(key: str, value) -> bool:
+    expected = CURSOR_FIELDS.get(key)
+    if expected is None:
+        return True
+    if expected is int:
+        return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+    return isinstance(value, expected)
+
+
+def cursor_offset(state: dict, key: str = "offset") -> int:
+    """The non-negative int position `key` of a decoded cursor (0 when absent)."""
+    value = state.get(key, 0)
+    if not _valid_field("offset", value):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value
+
+
+async def fetch_page(collection, limit: int, after_id: Optional[str] = None, query=None):
+    """
+    Returns up to `limit` document snapshots of `query` (defaults to the whole
+    collection) ordered by document id, starting after `after_id`.
+    """
+    page_query = (query or collection).order_by(DOCUMENT_ID).limit(limit)
+    if after_id:
+        page_query = page_query.start_after({DOCUMENT_ID: collection.document(after_id)})
+    return [doc async for doc in page_query.stream()]
+
+
+async def iter_documents(collection, query=None, batch_size: int = EXPORT_BATCH_SIZE):
+    """
+    Yields every document of `query` in id order, one keyset page at a time, so an
+    export never holds more than `batch_size` snapshots in memory.
+    """
+    after_id = None
+    while True:
+        docs = await fetch_page(collection, batch_size, after_id, query)
+        for doc in docs:
+            yield doc
+        if len(docs) < batch_size:
+            return
+        after_id = docs[-1].id
+
+
+async def stream_json_array(items: AsyncIterator[dict]):
+    """Encodes an async iterable of dicts as a JSON array, one item at a time."""
+    yield b"["
+    first = True
+    async for item in items:
+        if not first:
+            yield b","
+        first = False
+        yield json.dumps(jsonable_encoder(item)).encode()
+    yield b"]"
@@ -0,0 +1,100 @@
+"""
+In-process cache of serialised JSON responses.
+
+Entries are the response body bytes, so a hit skips both Firestore and JSON encoding.
+Each entry carries tags (e.g. "jobs", "job:<id>") and writes call invalidate() with the
+tags they affect. The TTL bounds how long writes made by other instances can go unseen.
+
+A read that misses takes generation() before querying and passes it to set(), which
+drops the body if one of its tags was invalidated in between: otherwise a write landing
+while the read awaits Firestore would leave the old body cached until the TTL.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Iterable, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+from app.settings import settings
+
+
+class ResponseCache:
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, body, tags)
+        self._keys_by_tag = defaultdict(set)
+        self._generation = 0
+        self._invalidated = OrderedDict()  # tag -> generation of its last invalidation, oldest first
+        self._forgotten = 0  # invalidations up to this generation are no longer tracked per tag
+        self._lock = threading.Lock()
+
+    def _drop(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._keys_by_tag[tag]
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_tag[tag]
+
+    def get(self, key) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def generation(self) -> int:
+        """Snapshot to pass to set() for a body read after this call."""
+        with self._lock:
+            return self._generation
+
+    def set(self, key, body: bytes, tags: Iterable[str], generation: Optional[int] = None):
+        tags = frozenset(tags)
+        with self._lock:
+            if generation is not None and (
+                    generation < self._forgotten
+                    or any(self._invalidated.get(tag, 0) > generation for tag in tags)):
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, body, tags)
+            for tag in tags:
+                self._keys_by_tag[tag].add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, *tags: str):
+        with self._lock:
+            self._generation += 1
+            for tag in tags:
+                self._invalidated.pop(tag, None)
+                self._invalidated[tag] = self._generation
+                for key in list(self._keys_by_tag.get(tag, ())):
+                    self._drop(key)
+            while len(self._invalidated) > self.max_entries:
+                _, self._forgotten = self._invalidated.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_tag.clear()
+
+
+def render_json(content) -> bytes:
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_bytes_response(body: bytes, cache_status: str) -> Response:
+    return Response(content=body, media_type="application/json", headers={"X-Cache": cache_status})
+
+
+response_cache = ResponseCache(settings.response_cache_ttl, settings.response_cache_max_entries)
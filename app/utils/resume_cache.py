@@ -0,0 +1,122 @@
+"""
+Content-addressed cache for generated resume PDFs.
+
+PDFs are stored under a hash of the values rendered into resume_template.html, so an
+unchanged profile is served without running Jinja or WeasyPrint again. The local disk
+store is the default; set RESUME_CACHE_BACKEND=s3 to keep it in the shared object storage.
+All methods do blocking I/O and should be called through run_in_threadpool.
+"""
+
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from app.services.storage_service import storage
+from app.settings import settings
+
+
+def resume_digest(context: dict, template_version: str = "") -> str:
+    payload = json.dumps(context, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{template_version}:{payload}".encode()).hexdigest()
+
+
+class _LruIndex:
+    """Tracks digests in least-recently-used order and reports which to evict."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def touch(self, digest: str) -> list:
+        with self._lock:
+            self._entries[digest] = True
+            self._entries.move_to_end(digest)
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[0])
+            return evicted
+
+    def discard(self, digest: str):
+        with self._lock:
+            self._entries.pop(digest, None)
+
+
+class DiskResumeCache:
+    def __init__(self, directory: str, max_entries: int):
+        self.directory = directory
+        self.index = _LruIndex(max_entries)
+        os.makedirs(directory, exist_ok=True)
+
+        # Rebuild LRU order from disk so a restart keeps the warm entries.
+        existing = [name for name in os.listdir(directory) if name.endswith(".pdf")]
+        existing.sort(key=lambda name: os.path.getmtime(os.path.join(directory, name)))
+        for name in existing:
+            for digest in self.index.touch(name[:-4]):
+                self._remove(digest)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, f"{digest}.pdf")
+
+    def _remove(self, digest: str):
+        try:
+            os.remove(self._path(digest))
+        except FileNotFoundError:
+            pass
+
+    def get(self, digest: str) -> Optional[bytes]:
+        try:
+            with open(self._path(digest), "rb") as f:
+                pdf = f.read()
+        except FileNotFoundError:
+            self.index.discard(digest)
+            return None
+        os.utime(self._path(digest))
+        self.index.touch(digest)
+        return pdf
+
+    def put(self, digest: str, pdf: bytes):
+        tmp_path = f"{self._path(digest)}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(pdf)
+        os.replace(tmp_path, self._path(digest))
+        for evicted in self.index.touch(digest):
+            self._remove(evicted)
+
+
+class StorageResumeCache:
+    """
+    Stores PDFs under resume-cache/ in the object storage backend. Eviction only covers
+    entries this process has seen; pair it with a bucket lifecycle rule on the prefix.
+    """
+
+    prefix = "resume-cache"
+
+    def __init__(self, max_entries: int):
+        self.index = _LruIndex(max_entries)
+
+    def _key(self, digest: str) -> str:
+        return f"{self.prefix}/{digest}.pdf"
+
+    def get(self, digest: str) -> Optional[bytes]:
+        pdf = storage.download(self._key(digest))
+        if pdf is None:
+            self.index.discard(digest)
+            return None
+        self.index.touch(digest)
+        return pdf
+
+    def put(self, digest: str, pdf: bytes):
+        storage.upload(io.BytesIO(pdf), self._key(digest), content_type="application/pdf")
+        for evicted in self.index.touch(digest):
+            storage.delete(self._key(evicted))
+
+
+if settings.resume_cache_backend == "s3":
+    resume_cache = StorageResumeCache(settings.resume_cache_max_entries)
+else:
+    resume_cache = DiskResumeCache(settings.resume_cache_dir, settings.resume_cache_max_entries)
@@ -1,31 +1,208 @@
+import io
+import threading
+import time
 import uuid
-from typing import Optional
-import boto3
-from botocore.config import Config
-from app.settings import settings
-
-s3_client = boto3.client(
-    "s3",
-    region_name=settings.aws_region,
-    aws_access_key_id=settings.aws_access_key,
-    aws_secret_access_key=settings.aws_secret_key,
-    config=Config(signature_version="s3v4", s3={"addressing_style": "virtual"})
-)
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+from PIL import Image, ImageOps, UnidentifiedImageError
+from app.models.shared import UploadKind, ImageSize, ImageFormat
+from app.services.storage_service import storage
 
-def upload_file_to_s3(file, folder: Optional[str] = "") -> str:
+# Helpers for stored files. Despite the module name they work with whichever
+# backend STORAGE_BACKEND selects (see app/services/storage_service.py).
+
+
+def store_upload(file, folder: Optional[str] = "") -> str:
+    """Stores an UploadFile under a fresh key in `folder` and returns the key."""
     file_extension = file.filename.split(".")[-1]
     file_key = f"{folder}/{uuid.uuid4()}.{file_extension}" if folder else f"{uuid.uuid4()}.{file_extension}"
 
-    s3_client.upload_fileobj(Fileobj=file.file, Bucket=settings.aws_bucket_name, Key=file_key)
+    storage.upload(file.file, file_key, content_type=file.content_type)
+    return file_key
+
+
+def upload_file_to_s3(file, folder: Optional[str] = "") -> str:
+    return storage.public_url(store_upload(file, folder))
+
+
+# Square bounding boxes (px) for image thumbnails, written next to the original.
+THUMBNAIL_SIZES = {ImageSize.SMALL.value: 96, ImageSize.MEDIUM.value: 320}
+THUMBNAIL_FORMATS = {
+    ImageFormat.WEBP.value: ("WEBP", "image/webp"),
+    ImageFormat.JPEG.value: ("JPEG", "image/jpeg"),
+}
+# Vector images (SVG logos) are served as they are, without thumbnails.
+VECTOR_CONTENT_TYPES = {"image/svg+xml"}
+
+
+def thumbnail_key(key: str, size: str, fmt: str) -> str:
+    return f"{key.rsplit('.', 1)[0]}-{size}.{fmt}"
+
+
+def create_thumbnails(key: str, image_bytes: bytes) -> Dict[str, Dict[str, str]]:
+    """
+    Writes every THUMBNAIL_SIZES x THUMBNAIL_FORMATS variant of an image and
+    returns their keys as {size: {format: key}}, for storing on the profile.
+    Images Pillow cannot read (e.g. SVG) get no variants; pick_image_key then
+    falls back to the original.
+    """
+    try:
+        original = Image.open(io.BytesIO(image_bytes))
+    except UnidentifiedImageError:
+        return {}
+    with original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode in ("RGBA", "LA", "P"):
+            rgba = image.convert("RGBA")
+            image = Image.new("RGB", rgba.size, (255, 255, 255))
+            image.paste(rgba, mask=rgba.split()[-1])
+        else:
+            image = image.convert("RGB")
+
+    variants = {}
+    for size, pixels in THUMBNAIL_SIZES.items():
+        thumbnail = image.copy()
+        thumbnail.thumbnail((pixels, pixels), Image.LANCZOS)
+        variants[size] = {}
+        for fmt, (pil_format, content_type) in THUMBNAIL_FORMATS.items():
+            buffer = io.BytesIO()
+            thumbnail.save(buffer, format=pil_format, quality=85)
+            variant_key = thumbnail_key(key, size, fmt)
+            buffer.seek(0)
+            storage.upload(buffer, variant_key, content_type=content_type,
+                           cache_control="public, max-age=31536000, immutable")
+            variants[size][fmt] = variant_key
+    return variants
+
+
+def upload_image_to_s3(file, folder: Optional[str] = "") -> Tuple[str, Dict[str, Dict[str, str]]]:
+    """
+    Stores an image like upload_file_to_s3 and adds its thumbnails.
+    Returns the original's key and the thumbnail keys.
+    """
+    if file.content_type in VECTOR_CONTENT_TYPES:
+        return store_upload(file, folder), {}
+    image_bytes = file.file.read()
+    file.file = io.BytesIO(image_bytes)
+    file_key = store_upload(file, folder)
+    return file_key, create_thumbnails(file_key, image_bytes)
+
+
+def create_thumbnails_for_key(key: str) -> Dict[str, Dict[str, str]]:
+    """Thumbnails an image that is already stored, e.g. after a direct upload."""
+    image_bytes = storage.download(key)
+    if image_bytes is None:
+        raise FileNotFoundError(key)
+    return create_thumbnails(key, image_bytes)
+
+
+def pick_image_key(data: dict, field: str, size: Optional[ImageSize] = None,
+                   fmt: ImageFormat = ImageFormat.WEBP) -> Optional[str]:
+    """
+    Returns the key of the `size` thumbnail of `data[field]` if it was generated,
+    otherwise the original key. Leave `size` empty for the original.
+    """
+    original = data.get(field)
+    if not original or not size:
+        return original
+    variants = data.get(f"{field}Thumbnails") or {}
+    return variants.get(size.value, {}).get(fmt.value) or original
+
+
+# Signed URLs are reused until they get close to expiry; object keys rarely change.
+SIGNED_URL_CACHE_MAX_ENTRIES = 20_000
+SIGNED_URL_REFRESH_MARGIN = 24 * 3600
+
+_signed_urls = OrderedDict()
+_signed_urls_lock = threading.Lock()
 
-    file_url = f"https://{settings.aws_bucket_name}.s3.{settings.aws_region}.amazonaws.com/{file_key}"
-    return file_url
 
 def generate_signed_url(key: str, expiration: int = 604800):
+    cache_key = (key, expiration)
+    now = time.time()
+    # Never hand out a URL with less than half of its requested lifetime left.
+    margin = min(SIGNED_URL_REFRESH_MARGIN, expiration // 2)
+
+    with _signed_urls_lock:
+        cached = _signed_urls.get(cache_key)
+        if cached and cached[1] - margin > now:
+            _signed_urls.move_to_end(cache_key)
+            return cached[0]
+
     print(f"Generating signed URL for key: {key}")
-    return s3_client.generate_presigned_url(
-        ClientMethod="get_object",
-        Params={"Bucket": settings.aws_bucket_name, "Key": key},
-        ExpiresIn=expiration
-    )
+    url = storage.sign(key, expiration)
+
+    with _signed_urls_lock:
+        _signed_urls[cache_key] = (url, now + expiration)
+        _signed_urls.move_to_end(cache_key)
+        while len(_signed_urls) > SIGNED_URL_CACHE_MAX_ENTRIES:
+            _signed_urls.popitem(last=False)
+    return url
+
+
+def generate_signed_urls(keys: Iterable[Optional[str]], expiration: int = 604800) -> Dict[str, str]:
+    """
+    Signs many keys at once for list endpoints. Empty and duplicate keys are skipped,
+    and cached URLs are reused, so each distinct key is signed at most once.
+    """
+    return {key: generate_signed_url(key, expiration) for key in dict.fromkeys(k for k in keys if k)}
+
+
+# Direct browser uploads: each kind has its own folder, content types and size limit.
+UPLOAD_POLICIES = {
+    UploadKind.PROFILE_PICTURE: {
+        "folder": "profile-pictures",
+        "content_types": ["image/jpeg", "image/png", "image/webp"],
+        "max_bytes": 5 * 1024 * 1024,
+    },
+    UploadKind.COMPANY_LOGO: {
+        "folder": "company-logos",
+        "content_types": ["image/jpeg", "image/png", "image/webp", "image/svg+xml"],
+        "max_bytes": 5 * 1024 * 1024,
+    },
+    UploadKind.EDUCATION_DOCUMENT: {
+        "folder": "education-documents",
+        "content_types": ["application/pdf", "image/jpeg", "image/png"],
+        "max_bytes": 20 * 1024 * 1024,
+    },
+}
+PRESIGNED_POST_EXPIRATION = 15 * 60
+
+
+def _upload_prefix(kind: UploadKind, owner_id: str) -> str:
+    return f"{UPLOAD_POLICIES[kind]['folder']}/{owner_id}/"
+
+
+def generate_presigned_upload(kind: UploadKind, owner_id: str, filename: str, content_type: str) -> dict:
+    """
+    Returns a presigned POST policy the browser can use to upload straight to storage.
+    Storage itself rejects files of another content type or larger than the kind allows.
+    The key is issued under the owner's id, so only the owner can confirm it.
+    """
+    policy = UPLOAD_POLICIES[kind]
+    if content_type not in policy["content_types"]:
+        raise ValueError(f"Content type {content_type} is not allowed for {kind.value}")
+
+    file_extension = filename.split(".")[-1] if "." in filename else "bin"
+    file_key = f"{_upload_prefix(kind, owner_id)}{uuid.uuid4()}.{file_extension}"
+
+    post = storage.presign_post(file_key, content_type, policy["max_bytes"], PRESIGNED_POST_EXPIRATION)
+
+    return {
+        "key": file_key,
+        "url": post["url"],
+        "fields": post["fields"],
+        "maxBytes": policy["max_bytes"],
+        "expiresIn": PRESIGNED_POST_EXPIRATION,
+    }
+
 
+def verify_uploaded_object(kind: UploadKind, owner_id: str, key: str) -> bool:
+    """
+    Checks that `key` was issued to `owner_id` for this kind and was actually uploaded.
+    """
+    policy = UPLOAD_POLICIES[kind]
+    if not key.startswith(_upload_prefix(kind, owner_id)) or ".." in key:
+        return False
+    head = storage.head(key)
+    return head is not None and head["ContentLength"] <= policy["max_bytes"]
@@ -0,0 +1,82 @@
+"""
+uid -> user type directory.
+
+The user type is recorded once per account: as a `userType` custom claim on the
+Firebase user (so it travels inside every ID token) and in user_directory/{uid}.
+Login reads the claim from the token it just received, falls back to the directory
+document, and only for accounts created before the directory existed searches the
+user collections (then backfills both).
+"""
+
+import base64
+import json
+import logging
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from firebase_admin import auth
+
+from app.firebase import db
+from app.utils.email_index import resolve_user_id
+
+logger = logging.getLogger("uvicorn")
+
+USER_DIRECTORY = "user_directory"
+USER_TYPE_CLAIM = "userType"
+USER_TYPES = ("candidate", "employer", "admin")
+
+
+def user_type_from_token(id_token: str) -> Optional[str]:
+    """
+    Reads the userType claim without verifying the signature. Only use this on tokens
+    received directly from Firebase Auth, never on tokens sent by a client.
+    """
+    try:
+        payload = id_token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except (IndexError, ValueError, AttributeError):
+        return None
+    return claims.get(USER_TYPE_CLAIM)
+
+
+def _set_user_type_claim(uid: str, user_type: str):
+    claims = dict(auth.get_user(uid).custom_claims or {})
+    claims[USER_TYPE_CLAIM] = user_type
+    auth.set_custom_user_claims(uid, claims)
+
+
+async def register_user_type(uid: str, user_type: str, email: Optional[str] = None):
+    """
+    Records the user type of a new (or backfilled) account. Failures are only logged:
+    the next login falls back to searching the user collections and retries.
+    """
+    user_type = getattr(user_type, "value", user_type)
+    try:
+        await db.collection(USER_DIRECTORY).document(uid).set({"userType": user_type, "email": email})
+        await run_in_threadpool(_set_user_type_claim, uid, user_type)
+    except Exception as e:
+        logger.warning(f"Could not record user type for {uid}: {e}")
+
+
+async def lookup_user_type(uid: str, email: Optional[str], id_token: Optional[str] = None) -> Optional[str]:
+    """
+    The user type of an account: from the token's claim, else the directory, else (for
+    legacy accounts) the first user collection holding `email`, which is then backfilled.
+    """
+    user_type = user_type_from_token(id_token) if id_token else None
+    if user_type:
+        return user_type
+
+    doc = await db.collection(USER_DIRECTORY).document(uid).get()
+    user_type = (doc.to_dict() or {}).get("userType") if doc.exists else None
+    if user_type:
+        return user_type
+
+    if not email:
+        # Nothing to search by, e.g. GitHub accounts without a public email.
+        return None
+    for collection in USER_TYPES:
+        if await resolve_user_id(collection, email):
+            await register_user_type(uid, collection, email)
+            return collection
+    return None